@@ -0,0 +1,262 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Balance Tuning Module
+
+Searches a grid of candidate enemy stats for the set that best matches
+target win rates and turns-to-kill for every class across a range of
+levels. Each (class, level, enemy stats) cell is evaluated with the combat
+simulator, cells are spread across a process pool, and finished cells are
+cached on disk by a hash of everything that affects them, so a repeated or
+widened sweep only computes the cells it has not seen.
+
+Usage:
+    python -m combat_system tune --enemy orc --health 60 80 100 \\
+        --strength 8 10 12 --levels 1-5 --target-win-rate 0.9 0.8 0.7 0.6 0.5 \\
+        --target-turns 4 --cache tuning_cache.json
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import combat_simulation
+import combat_system
+
+# Bump when combat rules or battle seeding change so old cached cells are not reused
+CACHE_VERSION = 2
+
+TUNABLE_STATS = ("health", "strength", "magic", "xp_reward", "gold_reward")
+
+# Candidates that differ only in rewards share their cached cells; the
+# simulator seeds their battles from the same stats, so a cached cell is
+# exactly what a fresh run would produce
+BATTLE_STATS = combat_simulation.BATTLE_STATS
+
+# ============================================================================
+# CANDIDATES
+# ============================================================================
+
+def build_candidates(base_enemy, grid):
+    """
+    Expand {"health": [60, 80], "strength": [8, 10]} into one enemy dict per
+    combination, starting from base_enemy. Health also sets max_health.
+    """
+    for stat in grid:
+        if stat not in TUNABLE_STATS:
+            raise ValueError(f"Cannot tune '{stat}'. Choose from: {', '.join(TUNABLE_STATS)}")
+
+    stats = list(grid)
+    candidates = []
+    for values in itertools.product(*(grid[stat] for stat in stats)):
+        enemy = dict(base_enemy)
+        enemy.update(zip(stats, values))
+        enemy["max_health"] = enemy["health"]
+        candidates.append(enemy)
+    return candidates
+
+
+def cell_key(character_class, level, enemy, policy, battles, seed, max_turns):
+    """Stable hash of every parameter that decides a cell's statistics."""
+    params = [CACHE_VERSION, character_class, level, combat_simulation.battle_key(enemy),
+              policy, battles, seed, max_turns]
+    return hashlib.blake2b(json.dumps(params).encode(), digest_size=16).hexdigest()
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+class TuningCache:
+    """Cell statistics keyed by cell_key, optionally kept in a JSON file."""
+    def __init__(self, path=None):
+        self.path = path
+        self.cells = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.cells = json.load(f)
+
+    def __contains__(self, key):
+        return key in self.cells
+
+    def get(self, key):
+        return self.cells.get(key)
+
+    def put(self, key, stats):
+        self.cells[key] = stats
+
+    def save(self):
+        if not self.path:
+            return
+        # Write then rename so an interrupted save keeps the old cache
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.cells, f)
+        os.replace(temp_path, self.path)
+
+# ============================================================================
+# SCORING
+# ============================================================================
+
+def target_at(target, level):
+    """A target is one number for every level or a {level: value} curve."""
+    if isinstance(target, dict):
+        return target[level]
+    return target
+
+
+def score_candidate(rows, enemy, target_win_rate, target_turns=None, turn_weight=1.0,
+                    target_xp_per_turn=None):
+    """
+    Mean squared miss over all cells: win-rate error, plus relative error
+    in mean turns and, if targeted, in XP earned per turn of fighting.
+    Lower is better.
+    """
+    total = 0.0
+    for row in rows:
+        level = row["level"]
+        total += (row["win_rate"] - target_at(target_win_rate, level)) ** 2
+
+        if target_turns is not None:
+            turns = target_at(target_turns, level)
+            total += turn_weight * ((row["mean_turns"] - turns) / turns) ** 2
+
+        if target_xp_per_turn is not None and row["mean_turns"]:
+            xp_rate = target_at(target_xp_per_turn, level)
+            total += ((enemy["xp_reward"] / row["mean_turns"] - xp_rate) / xp_rate) ** 2
+
+    return total / len(rows) if rows else 0.0
+
+# ============================================================================
+# SWEEP
+# ============================================================================
+
+def _evaluate(task):
+    key, character_class, level, enemy, policy, battles, seed, max_turns = task
+    stats = combat_simulation.evaluate_matchup(character_class, level, enemy, policy,
+                                               battles, seed, max_turns)
+    return key, stats
+
+
+def tune(base_enemy, grid, target_win_rate, target_turns=None, classes=None, levels=None,
+         policy="attack", battles=500, seed=0, max_turns=1000, workers=None, cache=None,
+         turn_weight=1.0, target_xp_per_turn=None):
+    """
+    Evaluate every candidate in the grid and return them best first, each as
+    {"enemy": stats, "score": float, "cells": [summary rows]}.
+    Cells found in `cache` are reused and new ones are added to it.
+    """
+    classes = classes or combat_simulation.DEFAULT_CLASSES
+    levels = levels or [1]
+    cache = cache if cache is not None else TuningCache()
+
+    if policy not in combat_simulation.POLICIES:
+        raise ValueError(f"Unknown policy '{policy}'. Choose from: {', '.join(combat_simulation.POLICIES)}")
+
+    candidates = build_candidates(base_enemy, grid)
+    cells = [(c, lvl) for c in classes for lvl in levels]
+
+    # One task per cell not already cached (candidates can share cells)
+    tasks = {}
+    for enemy in candidates:
+        for character_class, level in cells:
+            key = cell_key(character_class, level, enemy, policy, battles, seed, max_turns)
+            if key not in cache and key not in tasks:
+                tasks[key] = (key, character_class, level, enemy, policy, battles, seed, max_turns)
+
+    if workers == 1 or len(tasks) < 2:
+        results = list(map(_evaluate, tasks.values()))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate, tasks.values(), chunksize=max(1, len(tasks) // 64)))
+
+    for key, stats in results:
+        cache.put(key, stats)
+    cache.save()
+
+    ranked = []
+    for enemy in candidates:
+        rows = []
+        for character_class, level in cells:
+            key = cell_key(character_class, level, enemy, policy, battles, seed, max_turns)
+            cell = (character_class, level, enemy["name"])
+            rows.append(combat_simulation.summarize(cell, cache.get(key)))
+
+        score = score_candidate(rows, enemy, target_win_rate, target_turns, turn_weight, target_xp_per_turn)
+        ranked.append({"enemy": enemy, "score": score, "cells": rows})
+
+    ranked.sort(key=lambda candidate: candidate["score"])
+    return ranked
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def parse_curve(values, levels):
+    """One value applies to every level; otherwise one value per level."""
+    if values is None:
+        return None
+    if len(values) == 1:
+        return values[0]
+    if len(values) != len(levels):
+        raise ValueError(f"Expected 1 or {len(levels)} target values, got {len(values)}")
+    return dict(zip(levels, values))
+
+
+def print_ranking(ranked, top=5):
+    print(f"{'rank':<6}{'score':>10}  stats")
+    for rank, candidate in enumerate(ranked[:top], start=1):
+        enemy = candidate["enemy"]
+        stats = ", ".join(f"{stat}={enemy[stat]}" for stat in TUNABLE_STATS)
+        print(f"{rank:<6}{candidate['score']:>10.4f}  {stats}")
+
+    if ranked:
+        print("\nBest candidate per class and level:")
+        combat_simulation.print_table(ranked[0]["cells"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m combat_system tune",
+                                     description="Grid search enemy stats toward target win rates.")
+    parser.add_argument("--enemy", default="goblin", help="template the candidates start from")
+    for stat in TUNABLE_STATS:
+        parser.add_argument(f"--{stat.replace('_', '-')}", type=int, nargs="+", dest=stat)
+    parser.add_argument("--classes", nargs="+", default=combat_simulation.DEFAULT_CLASSES)
+    parser.add_argument("--levels", nargs="+", default=["1"], help="levels or ranges like 1-10")
+    parser.add_argument("--target-win-rate", type=float, nargs="+", required=True,
+                        help="one rate for all levels or one per level")
+    parser.add_argument("--target-turns", type=float, nargs="+", help="mean turns per battle")
+    parser.add_argument("--target-xp-per-turn", type=float, nargs="+")
+    parser.add_argument("--policy", choices=list(combat_simulation.POLICIES), default="attack")
+    parser.add_argument("--battles", type=int, default=500, help="battles per cell")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--cache", help="JSON file of computed cells, reused between runs")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--json", help="also write the ranking to this JSON file")
+    args = parser.parse_args(argv)
+
+    levels = combat_simulation.parse_levels(args.levels)
+    grid = {stat: getattr(args, stat) for stat in TUNABLE_STATS if getattr(args, stat)}
+
+    ranked = tune(
+        combat_system.create_enemy(args.enemy), grid,
+        parse_curve(args.target_win_rate, levels),
+        parse_curve(args.target_turns, levels),
+        classes=args.classes, levels=levels, policy=args.policy, battles=args.battles,
+        seed=args.seed, max_turns=args.max_turns, workers=args.workers,
+        cache=TuningCache(args.cache),
+        target_xp_per_turn=parse_curve(args.target_xp_per_turn, levels),
+    )
+    print_ranking(ranked, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(ranked, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
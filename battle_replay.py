@@ -0,0 +1,237 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Battle Replay Module
+
+Records battles as compact binary replays and plays them back. A replay
+holds the starting stats, the battle's RNG seed and one 5-byte entry per
+turn (player action, player amount, enemy damage), so a typical battle
+takes around 100 bytes. Because every battle's dice come from its seed,
+replaying the recorded actions rebuilds the battle exactly, with no I/O.
+
+Record layout (little-endian):
+    header   version, seed, max_turns, character and enemy stats, turn count
+    names    character name, class and enemy name, each length-prefixed UTF-8
+    turns    turn count entries of (action code, amount, enemy damage)
+"""
+
+import struct
+
+import combat_system
+from custom_exceptions import CorruptedDataError, ReplayMismatchError
+
+REPLAY_VERSION = 1
+
+# version, seed, max_turns (0 = none), character health/max_health/strength/magic,
+# enemy health/max_health/strength/magic/xp_reward/gold_reward, turn count
+HEADER = struct.Struct("<BQI4I6II")
+NAME_LENGTH = struct.Struct("<B")
+TURN = struct.Struct("<Bhh")
+RECORD_LENGTH = struct.Struct("<I")
+
+# Player action codes stored in each turn entry
+ACTION_ATTACK = 0
+ACTION_SPECIAL = 1
+ACTION_ESCAPE_FAILED = 2
+ACTION_ESCAPE = 3
+ACTION_WASTED = 4
+
+REPLAY_ACTIONS = {
+    ACTION_ATTACK: combat_system.ATTACK,
+    ACTION_SPECIAL: combat_system.SPECIAL,
+    ACTION_ESCAPE_FAILED: combat_system.ESCAPE,
+    ACTION_ESCAPE: combat_system.ESCAPE,
+    ACTION_WASTED: "wasted",
+}
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+class ReplayRecorder(combat_system.BattleSink):
+    """
+    Sink that records a battle while passing events on to the battle's own
+    sink. Attach it with ReplayRecorder(battle) before begin_battle().
+    """
+    level = combat_system.LOG_ACTIONS
+
+    def __init__(self, battle):
+        super().__init__()
+        seed = battle.seed
+        if seed is None or not 0 <= seed < 2 ** 64:
+            raise ValueError("Only battles created from a 64-bit seed can be recorded")
+        if battle.turn != 1 or not battle.combat_active:
+            raise ValueError("Attach the recorder before the battle starts")
+
+        self.character = dict(battle.character)
+        self.enemy = dict(battle.enemy)
+        self.seed = seed
+        self.max_turns = battle.max_turns or 0
+        self.turns = []
+
+        # Take over as the battle's sink, still feeding the original one
+        self.inner = battle.sink
+        self.inner_level = battle.log_level
+        battle.sink = self
+        battle.log_level = max(battle.log_level, self.level)
+
+    def emit(self, event):
+        kind = event["type"]
+
+        if kind == "turn":
+            self.turns.append([ACTION_WASTED, 0, 0])
+        elif kind == "attack":
+            if event["actor"] == "player":
+                self.turns[-1][0] = ACTION_ATTACK
+                self.turns[-1][1] = event["damage"]
+            else:
+                self.turns[-1][2] = event["damage"]
+        elif kind == "special":
+            self.turns[-1][0] = ACTION_SPECIAL
+            self.turns[-1][1] = event["amount"]
+        elif kind == "escape":
+            self.turns[-1][0] = ACTION_ESCAPE if event["success"] else ACTION_ESCAPE_FAILED
+
+        if combat_system.EVENT_LEVELS[kind] <= self.inner_level:
+            self.inner(event)
+
+    def flush(self):
+        flush = getattr(self.inner, "flush", None)
+        if flush is not None:
+            flush()
+
+    def to_bytes(self):
+        """Encode the recording; call once the battle has finished."""
+        character, enemy = self.character, self.enemy
+        try:
+            parts = [HEADER.pack(
+                REPLAY_VERSION, self.seed, self.max_turns,
+                character["health"], character["max_health"], character["strength"], character["magic"],
+                enemy["health"], enemy["max_health"], enemy["strength"], enemy["magic"],
+                enemy["xp_reward"], enemy["gold_reward"],
+                len(self.turns),
+            )]
+            for name in (character["name"], character["class"], enemy["name"]):
+                encoded = name.encode("utf-8")
+                parts.append(NAME_LENGTH.pack(len(encoded)))
+                parts.append(encoded)
+            parts.extend(TURN.pack(*turn) for turn in self.turns)
+        except struct.error as e:
+            raise ValueError(f"Battle cannot be stored as a replay: {e}")
+
+        return b"".join(parts)
+
+
+def record_battle(character, enemy, policy=combat_system.ALWAYS_ATTACK, sink=None,
+                  max_turns=1000, seed=None):
+    """Fight a headless battle and return (result, replay bytes)."""
+    battle = combat_system.SimpleBattle(
+        character, enemy, policy=policy,
+        sink=sink if sink is not None else combat_system.null_sink,
+        max_turns=max_turns, seed=seed,
+    )
+    recorder = ReplayRecorder(battle)
+    result = battle.start_battle()
+    return result, recorder.to_bytes()
+
+# ============================================================================
+# DECODING AND REPLAY
+# ============================================================================
+
+def decode_replay(data):
+    """Unpack replay bytes into a dict of starting state, seed and turns."""
+    try:
+        fields = HEADER.unpack_from(data, 0)
+        offset = HEADER.size
+        if fields[0] != REPLAY_VERSION:
+            raise CorruptedDataError(f"Unsupported replay version {fields[0]}")
+
+        names = []
+        for _ in range(3):
+            (length,) = NAME_LENGTH.unpack_from(data, offset)
+            offset += NAME_LENGTH.size
+            names.append(bytes(data[offset:offset + length]).decode("utf-8"))
+            offset += length
+
+        turn_count = fields[13]
+        turns = list(TURN.iter_unpack(data[offset:offset + turn_count * TURN.size]))
+    except (struct.error, UnicodeDecodeError) as e:
+        raise CorruptedDataError(f"Replay data is corrupted: {e}")
+
+    if len(turns) != turn_count or offset + turn_count * TURN.size != len(data):
+        raise CorruptedDataError("Replay data is truncated or has trailing bytes")
+
+    return {
+        "seed": fields[1],
+        "max_turns": fields[2] or None,
+        "character": {
+            "name": names[0], "class": names[1],
+            "health": fields[3], "max_health": fields[4], "strength": fields[5], "magic": fields[6],
+            "experience": 0, "gold": 0,
+        },
+        "enemy": {
+            "name": names[2],
+            "health": fields[7], "max_health": fields[8], "strength": fields[9], "magic": fields[10],
+            "xp_reward": fields[11], "gold_reward": fields[12],
+        },
+        "turns": turns,
+    }
+
+
+def replay_battle(data, verify=True, sink=None):
+    """
+    Rebuild a recorded battle by replaying its actions from its seed.
+    Returns (result, character, enemy) in their final state. With verify,
+    every turn is checked against the recording and ReplayMismatchError is
+    raised on the first difference.
+    """
+    replay = decode_replay(data)
+    battle = combat_system.SimpleBattle(
+        replay["character"], replay["enemy"],
+        sink=sink if sink is not None else combat_system.null_sink,
+        max_turns=replay["max_turns"], seed=replay["seed"],
+    )
+    checker = ReplayRecorder(battle) if verify else None
+
+    battle.begin_battle()
+    for number, (code, _, _) in enumerate(replay["turns"], start=1):
+        if not battle.combat_active:
+            raise ReplayMismatchError(f"Battle ended after {number - 1} of {len(replay['turns'])} turns")
+        battle.play_round(REPLAY_ACTIONS.get(code, "wasted"))
+
+        if checker is not None and tuple(checker.turns[-1]) != replay["turns"][number - 1]:
+            raise ReplayMismatchError(
+                f"Turn {number} replayed as {tuple(checker.turns[-1])}, "
+                f"recorded as {replay['turns'][number - 1]}"
+            )
+
+    if battle.combat_active:
+        raise ReplayMismatchError("Battle was still going when the recording ended")
+
+    return battle.finish_battle(), battle.character, battle.enemy
+
+# ============================================================================
+# REPLAY FILES
+# ============================================================================
+# Replays are appended to a binary file as length-prefixed records, so a day
+# of battles is one file that can be streamed back a record at a time.
+
+def append_replay(stream, data):
+    """Append one replay record to a binary stream opened for writing."""
+    stream.write(RECORD_LENGTH.pack(len(data)))
+    stream.write(data)
+
+
+def iter_replays(stream):
+    """Yield each replay record from a binary stream, one at a time."""
+    while True:
+        prefix = stream.read(RECORD_LENGTH.size)
+        if not prefix:
+            return
+        if len(prefix) != RECORD_LENGTH.size:
+            raise CorruptedDataError("Replay file ends in the middle of a record")
+
+        (length,) = RECORD_LENGTH.unpack(prefix)
+        data = stream.read(length)
+        if len(data) != length:
+            raise CorruptedDataError("Replay file ends in the middle of a record")
+        yield data
@@ -0,0 +1,119 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Battle Scheduler Module
+
+Runs many battles at once on one asyncio event loop. Instead of blocking on
+input(), each player turn awaits an input coroutine, so thousands of players
+can sit in battle while the loop serves whoever answers next. A player who
+does not answer within the turn timeout gets a default action (attack).
+"""
+
+import asyncio
+
+import combat_system
+
+DEFAULT_TURN_TIMEOUT = 30.0
+DEFAULT_MAX_ACTIVE = 1000
+
+# ============================================================================
+# INPUT SOURCES
+# ============================================================================
+# An input source is a coroutine function taking the battle and returning
+# one of the combat_system actions (ATTACK, SPECIAL, ESCAPE).
+
+def queue_input(queue):
+    """Input source that takes each action from an asyncio.Queue."""
+    async def next_action(battle):
+        return await queue.get()
+    return next_action
+
+
+def policy_input(policy):
+    """Input source that answers straight away using a synchronous policy."""
+    policy = combat_system._as_policy(policy)
+
+    async def next_action(battle):
+        return policy(battle)
+    return next_action
+
+# ============================================================================
+# RUNNING BATTLES
+# ============================================================================
+
+async def run_battle_async(battle, get_action, turn_timeout=DEFAULT_TURN_TIMEOUT,
+                           timeout_action=combat_system.ATTACK):
+    """
+    Fight a SimpleBattle to the end, awaiting get_action(battle) each turn.
+    Turns not answered within turn_timeout seconds use timeout_action
+    (None waits forever). Returns the battle result.
+    """
+    battle.begin_battle()
+
+    while battle.combat_active:
+        try:
+            action = await asyncio.wait_for(get_action(battle), turn_timeout)
+        except asyncio.TimeoutError:
+            action = timeout_action
+        battle.play_round(action)
+
+        # Let other battles run even when every input is already waiting
+        await asyncio.sleep(0)
+
+    return battle.finish_battle()
+
+
+class BattleScheduler:
+    """
+    Multiplexes battles on the running event loop, at most max_active at a
+    time; battles beyond the cap wait for a free place before starting.
+    """
+    def __init__(self, max_active=DEFAULT_MAX_ACTIVE, turn_timeout=DEFAULT_TURN_TIMEOUT,
+                 timeout_action=combat_system.ATTACK, sink=None, max_turns=1000):
+        if max_active < 1:
+            raise ValueError("max_active must be at least 1")
+
+        self.max_active = max_active
+        self.turn_timeout = turn_timeout
+        self.timeout_action = timeout_action
+        self.sink = sink if sink is not None else combat_system.null_sink
+        self.max_turns = max_turns
+        self.active = 0
+        self.peak_active = 0
+        self.completed = 0
+        self._slots = None
+
+    async def run(self, character, enemy, get_action, seed=None):
+        """Fight one battle once a place is free; returns its result."""
+        # Created lazily so the semaphore belongs to the running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_active)
+
+        async with self._slots:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            try:
+                battle = combat_system.SimpleBattle(
+                    character, enemy, sink=self.sink, max_turns=self.max_turns, seed=seed
+                )
+                return await run_battle_async(
+                    battle, get_action, self.turn_timeout, self.timeout_action
+                )
+            finally:
+                self.active -= 1
+                self.completed += 1
+
+    async def run_all(self, sessions):
+        """
+        Run (character, enemy, get_action) sessions concurrently.
+        Returns results in session order; a failed battle's slot holds its
+        exception so one bad session does not cancel the rest.
+        """
+        return await asyncio.gather(
+            *(self.run(character, enemy, get_action) for character, enemy, get_action in sessions),
+            return_exceptions=True,
+        )
+
+
+def run_battles(sessions, **options):
+    """Blocking helper: run sessions on a new event loop and return results."""
+    return asyncio.run(BattleScheduler(**options).run_all(sessions))
@@ -0,0 +1,328 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Inventory Benchmarks
+
+Times the inventory_system functions on inventories of different sizes and
+writes the results as JSON so two revisions can be compared.
+
+Usage:
+    python benchmarks/inventory_benchmarks.py --output before.json
+    python benchmarks/inventory_benchmarks.py --output after.json
+    python benchmarks/inventory_benchmarks.py --compare before.json after.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+# Benchmarks live one folder below the game modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import character_manager
+import inventory_system
+
+DEFAULT_SIZES = [20, 1000, 100000]
+
+POTION = {"item_id": "health_potion", "name": "Health Potion", "type": "consumable",
+          "effect": "health:20", "cost": 25}
+IRON_SWORD = {"item_id": "iron_sword", "name": "Iron Sword", "type": "weapon",
+              "effect": "strength:5", "cost": 100}
+STEEL_SWORD = {"item_id": "steel_sword", "name": "Steel Sword", "type": "weapon",
+               "effect": "strength:10", "cost": 250}
+ITEM_DATA = {item["item_id"]: item for item in (POTION, IRON_SWORD, STEEL_SWORD)}
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+def make_character(size, extra=()):
+    """
+    Build a character holding `size` filler items followed by `extra` items.
+    Capacity is set far above what any case adds.
+    """
+    # Use the game's own inventory list where it has one, as real characters do
+    inventory = getattr(character_manager, "InventoryList", list)(f"filler_{i % 50}" for i in range(size))
+    inventory.extend(extra)
+    character = {
+        "name": "Bench",
+        "health": 10,
+        "max_health": 100000,
+        "strength": 10,
+        "magic": 10,
+        "gold": 10 ** 9,
+        "inventory": inventory,
+        "inventory_capacity": len(inventory) + 10 ** 6,
+        "equipped_weapon": None,
+        "item_data": ITEM_DATA,
+    }
+
+    # Build any lazy inventory index now so cases time the steady state
+    warm_up = getattr(inventory_system, "get_inventory_slots_used", None)
+    if warm_up is not None:
+        warm_up(character)
+    return character
+
+# ============================================================================
+# BENCHMARK CASES
+# ============================================================================
+# Each case takes (size, number) and returns (setup, stmt). setup() runs
+# before every timed repeat and stmt() is the body being timed `number` times.
+
+def case_add(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size)
+
+    def stmt():
+        inventory_system.add_item_to_inventory(state["char"], "health_potion")
+
+    return setup, stmt
+
+
+def case_remove(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size, ["health_potion"] * number)
+
+    def stmt():
+        inventory_system.remove_item_from_inventory(state["char"], "health_potion")
+
+    return setup, stmt
+
+
+def case_has(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size)
+
+    def stmt():
+        # Missing item: the worst case when membership meant scanning the list
+        inventory_system.has_item(state["char"], "missing_item")
+
+    return setup, stmt
+
+
+def case_count(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size, ["health_potion"] * 5)
+
+    def stmt():
+        inventory_system.count_item(state["char"], "health_potion")
+
+    return setup, stmt
+
+
+def case_use(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size, ["health_potion"] * number)
+
+    def stmt():
+        inventory_system.use_item(state["char"], "health_potion", POTION)
+
+    return setup, stmt
+
+
+def case_equip(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size, ["iron_sword", "steel_sword"])
+        state["turn"] = 0
+
+    def stmt():
+        # Alternate swords so each equip also unequips the previous one
+        state["turn"] += 1
+        sword = IRON_SWORD if state["turn"] % 2 else STEEL_SWORD
+        inventory_system.equip_weapon(state["char"], sword["item_id"], sword)
+
+    return setup, stmt
+
+
+def case_purchase(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size)
+
+    def stmt():
+        inventory_system.purchase_item(state["char"], "health_potion", POTION)
+
+    return setup, stmt
+
+
+def case_sell(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size, ["health_potion"] * number)
+
+    def stmt():
+        inventory_system.sell_item(state["char"], "health_potion", POTION)
+
+    return setup, stmt
+
+
+def case_display(size, number):
+    state = {}
+
+    def setup():
+        state["char"] = make_character(size, ["health_potion"] * 5)
+
+    def stmt():
+        with contextlib.redirect_stdout(io.StringIO()):
+            inventory_system.display_inventory(state["char"], ITEM_DATA)
+
+    return setup, stmt
+
+
+CASES = {
+    "add": case_add,
+    "remove": case_remove,
+    "has": case_has,
+    "count": case_count,
+    "use": case_use,
+    "equip": case_equip,
+    "purchase": case_purchase,
+    "sell": case_sell,
+    "display": case_display,
+}
+
+# ============================================================================
+# RUNNING
+# ============================================================================
+
+def calls_for_size(size):
+    # Fewer calls on huge inventories so a full run stays in the seconds range
+    if size <= 1000:
+        return 200
+    return 20
+
+
+def run_case(name, size, repeat=5, number=None):
+    """
+    Time one case and return per-call timings in seconds.
+    """
+    if number is None:
+        number = calls_for_size(size)
+
+    setup, stmt = CASES[name](size, number)
+    timer = timeit.Timer(stmt, setup)
+    totals = timer.repeat(repeat=repeat, number=number)
+
+    per_call = sorted(total / number for total in totals)
+    return {
+        "calls": number,
+        "repeat": repeat,
+        "best_s": per_call[0],
+        "median_s": per_call[len(per_call) // 2],
+    }
+
+
+def run_benchmarks(sizes=None, cases=None, repeat=5, number=None):
+    """
+    Run every case at every size and return a JSON-ready dict.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    cases = cases or list(CASES)
+
+    results = {}
+    for name in cases:
+        if name not in CASES:
+            raise ValueError(f"Unknown benchmark '{name}'. Choose from: {', '.join(CASES)}")
+        results[name] = {}
+        for size in sizes:
+            results[name][str(size)] = run_case(name, size, repeat, number)
+
+    return {
+        "revision": current_revision(),
+        "python": platform.python_version(),
+        "sizes": sizes,
+        "results": results,
+    }
+
+
+def current_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_results(old, new):
+    """
+    Return (case, size, old_s, new_s, speedup) rows for cases in both runs.
+    """
+    rows = []
+    for name, by_size in new["results"].items():
+        for size, timing in by_size.items():
+            old_timing = old["results"].get(name, {}).get(size)
+            if old_timing is None:
+                continue
+            old_s = old_timing["best_s"]
+            new_s = timing["best_s"]
+            rows.append((name, int(size), old_s, new_s, old_s / new_s if new_s else float("inf")))
+    return rows
+
+
+def print_results(report):
+    print(f"Revision {report['revision']} (Python {report['python']})")
+    print(f"{'case':<10}{'size':>10}{'best us/call':>16}{'median us/call':>18}")
+    for name, by_size in report["results"].items():
+        for size, timing in by_size.items():
+            print(f"{name:<10}{size:>10}{timing['best_s'] * 1e6:>16.3f}{timing['median_s'] * 1e6:>18.3f}")
+
+
+def print_comparison(rows, old_label, new_label):
+    print(f"{old_label} -> {new_label}")
+    print(f"{'case':<10}{'size':>10}{'old us':>12}{'new us':>12}{'speedup':>10}")
+    for name, size, old_s, new_s, speedup in rows:
+        print(f"{name:<10}{size:>10}{old_s * 1e6:>12.3f}{new_s * 1e6:>12.3f}{speedup:>9.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark inventory_system at several inventory sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two saved JSON result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        print_comparison(compare_results(old, new), old["revision"], new["revision"])
+        return
+
+    report = run_benchmarks(args.sizes, args.cases, args.repeat)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
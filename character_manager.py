@@ -8,6 +8,10 @@ AI Usage: Assisted in completing missing functions and fixing logic structure. A
 """
 
 import os
+import threading
+from contextlib import nullcontext
+from quest_handler import OrderedQuestSet, set_quest_totals, check_level_unlocks
+from quest_events import LEVEL_UP
 from custom_exceptions import (
     InvalidCharacterClassError,
     CharacterNotFoundError,
@@ -16,6 +20,45 @@ from custom_exceptions import (
     CharacterDeadError
 )
 
+# ============================================================================
+# INVENTORY STORAGE
+# ============================================================================
+
+class InventoryList(list):
+    """
+    The character's inventory: a plain list of item IDs, one entry per item,
+    that also counts its changes in `version`. inventory_system keeps item
+    counts and slots beside it and uses the version to spot edits made
+    directly on the list, even ones that leave its length the same.
+    """
+    def __init__(self, item_ids=()):
+        super().__init__(item_ids)
+        self.version = 0
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def _changed(self):
+        self.version += 1
+
+
+def _counted(name):
+    method = getattr(list, name)
+
+    def changed(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+
+    changed.__name__ = name
+    return changed
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(InventoryList, _name, _counted(_name))
+del _name
+
 # ============================================================================
 # CHARACTER CREATION
 # ============================================================================
@@ -53,9 +96,9 @@ def create_character(name, character_class):
         "magic": base["magic"],
         "experience": 0,
         "gold": 100,
-        "inventory": [],
-        "active_quests": [],
-        "completed_quests": []
+        "inventory": InventoryList(),
+        "active_quests": OrderedQuestSet(),
+        "completed_quests": OrderedQuestSet()
     }
 
 # ============================================================================
@@ -95,6 +138,23 @@ def save_character(character, save_directory="data/save_games"):
         f"COMPLETED_QUESTS: {completed_str}\n"
     )
 
+    # Only characters with a custom inventory size carry this line
+    if "inventory_capacity" in character:
+        file_content += f"INVENTORY_CAPACITY: {character['inventory_capacity']}\n"
+
+    # Types of the items held, so a loaded inventory stacks them as before
+    item_types = character.get("item_types", {})
+    types_str = ",".join(f"{item_id}={item_types[item_id]}"
+                         for item_id in dict.fromkeys(character["inventory"]) if item_id in item_types)
+    if types_str:
+        file_content += f"ITEM_TYPES: {types_str}\n"
+
+    # Running quest totals, so loading does not recount completed quests
+    if "quest_totals" in character:
+        totals = character["quest_totals"]
+        file_content += (f"QUEST_TOTALS: {totals['catalog']},{totals['completed']},"
+                         f"{totals['xp']},{totals['gold']}\n")
+
     # Save into the file
     with open(filepath, "w") as f:
         f.write(file_content)
@@ -150,10 +210,18 @@ def load_character(character_name, save_directory="data/save_games"):
             "magic": int(data["MAGIC"]),
             "experience": int(data["EXPERIENCE"]),
             "gold": int(data["GOLD"]),
-            "inventory": data["INVENTORY"].split(",") if data["INVENTORY"] else [],
-            "active_quests": data["ACTIVE_QUESTS"].split(",") if data["ACTIVE_QUESTS"] else [],
-            "completed_quests": data["COMPLETED_QUESTS"].split(",") if data["COMPLETED_QUESTS"] else []
+            "inventory": InventoryList(data["INVENTORY"].split(",") if data["INVENTORY"] else []),
+            "active_quests": OrderedQuestSet(data["ACTIVE_QUESTS"].split(",") if data["ACTIVE_QUESTS"] else []),
+            "completed_quests": OrderedQuestSet(data["COMPLETED_QUESTS"].split(",") if data["COMPLETED_QUESTS"] else [])
         }
+        if "INVENTORY_CAPACITY" in data:
+            character["inventory_capacity"] = int(data["INVENTORY_CAPACITY"])
+        if "ITEM_TYPES" in data:
+            character["item_types"] = dict(pair.split("=", 1) for pair in data["ITEM_TYPES"].split(","))
+        if "QUEST_TOTALS" in data:
+            catalog, completed, xp, gold = data["QUEST_TOTALS"].split(",")
+            set_quest_totals(character, {"catalog": catalog, "completed": int(completed),
+                                         "xp": int(xp), "gold": int(gold)})
     except KeyError:
         raise InvalidSaveDataError("Missing fields in save file")
     except ValueError:
@@ -203,12 +271,13 @@ def delete_character(character_name, save_directory="data/save_games"):
 # CHARACTER OPERATIONS
 # ============================================================================
 
-def gain_experience(character, xp_amount):
+def gain_experience(character, xp_amount, event_bus=None):
     # Prevent gaining XP while dead
     if character["health"] <= 0:
         raise CharacterDeadError("Dead characters cannot gain XP.")
 
     character["experience"] += xp_amount  # add XP
+    previous_level = character["level"]
 
     # Perform level-ups (can happen multiple times)
     while character["experience"] >= character["level"] * 100:
@@ -223,15 +292,25 @@ def gain_experience(character, xp_amount):
         # Restore HP to full
         character["health"] = character["max_health"]
 
+    # One event however many levels were gained, then the quests it unlocks
+    # (for characters whose quest board has been looked at)
+    if event_bus is not None and character["level"] != previous_level:
+        event_bus.publish(LEVEL_UP, character=character["name"], level=character["level"],
+                          previous_level=previous_level)
+        frontier = character.get("_quest_frontier")
+        if frontier is not None:
+            check_level_unlocks(character, frontier["catalog"], event_bus)
+
 
 def add_gold(character, amount):
-    # Prevent gold from going negative
-    new_total = character["gold"] + amount
-    if new_total < 0:
-        raise ValueError("Not enough gold.")
+    with character_lock(character):
+        # Prevent gold from going negative
+        new_total = character["gold"] + amount
+        if new_total < 0:
+            raise ValueError("Not enough gold.")
 
-    character["gold"] = new_total
-    return new_total
+        character["gold"] = new_total
+        return new_total
 
 
 def heal_character(character, amount):
@@ -255,6 +334,48 @@ def revive_character(character):
     character["health"] = character["max_health"] // 2
     return True
 
+# ============================================================================
+# CONCURRENCY
+# ============================================================================
+
+# Locking is opt-in. When enabled, each character maps to one of a fixed
+# number of lock "stripes" by name, so two threads touching the same character
+# take turns while different characters rarely share a lock.
+_lock_stripes = None
+_NO_LOCK = nullcontext()
+
+
+def enable_character_locking(stripes=64):
+    """
+    Turn on per-character locking for inventory and gold changes.
+    """
+    global _lock_stripes
+
+    if stripes < 1:
+        raise ValueError("Need at least one lock stripe.")
+
+    # RLock so a locked function can call another locked function (equip -> unequip)
+    _lock_stripes = [threading.RLock() for _ in range(stripes)]
+
+
+def disable_character_locking():
+    """
+    Turn per-character locking back off (the default).
+    """
+    global _lock_stripes
+    _lock_stripes = None
+
+
+def character_lock(character):
+    """
+    Return the lock guarding this character, or a no-op context when locking is off.
+    """
+    stripes = _lock_stripes
+    if stripes is None:
+        return _NO_LOCK
+
+    return stripes[hash(character.get("name", "")) % len(stripes)]
+
 # ============================================================================
 # VALIDATION
 # ============================================================================
@@ -0,0 +1,423 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Combat Simulation Module
+
+Runs many headless battles for every (class, level, enemy) combination and
+reports win rates, mean turns and mean HP remaining with 95% confidence
+intervals. Battles are spread across a process pool; every battle gets its own
+random stream seeded from the run seed, so results do not depend on the
+worker count.
+
+Usage:
+    python -m combat_system simulate --battles 1000 --levels 1-10 --workers 4
+"""
+
+import argparse
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import character_manager
+import combat_system
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the vectorized simulator
+    np = None
+
+DEFAULT_CLASSES = ["Warrior", "Mage", "Rogue", "Cleric"]
+DEFAULT_ENEMIES = ["goblin", "orc", "dragon"]
+
+POLICIES = {
+    "attack": combat_system.ALWAYS_ATTACK,
+    "special": combat_system.ALWAYS_SPECIAL,
+}
+
+# Z value for 95% confidence intervals
+Z_95 = 1.96
+
+# The only enemy stats that change how a battle plays out. Enemies that
+# differ only in rewards or name fight the same battles with the same dice.
+BATTLE_STATS = ("health", "strength")
+
+# ============================================================================
+# SETUP HELPERS
+# ============================================================================
+
+def build_character(character_class, level):
+    """Create a fresh character and level it up the normal way."""
+    character = character_manager.create_character(f"Sim{character_class}", character_class)
+    xp_needed = sum(lvl * 100 for lvl in range(1, level))
+    if xp_needed:
+        character_manager.gain_experience(character, xp_needed)
+    return character
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+def _empty_stats():
+    return {
+        "battles": 0, "wins": 0, "draws": 0,
+        "turns": 0, "turns_sq": 0,
+        "hp": 0, "hp_sq": 0,
+    }
+
+
+def run_chunk(task):
+    """
+    Run `count` battles of one cell starting at battle number `start`.
+    Returns the cell key and summed statistics.
+    """
+    cell, start, count, base_seed, policy_name, max_turns = task
+    character_class, level, enemy_type = cell
+    policy = POLICIES[policy_name]
+    enemies = combat_system.EnemyPool()
+    stats = _empty_stats()
+
+    for i in range(start, start + count):
+        seed = combat_system.derive_seed(base_seed, character_class, level, enemy_type, i)
+        character = build_character(character_class, level)
+        enemy = enemies.acquire(enemy_type)
+        result = combat_system.run_headless_battle(character, enemy, policy, max_turns=max_turns, seed=seed)
+        enemies.release(enemy)
+
+        _add_battle(stats, result, character["health"])
+
+    return cell, stats
+
+
+def evaluate_matchup(character_class, level, enemy, policy="attack", battles=1000, seed=0,
+                     max_turns=1000):
+    """
+    Summed statistics for `battles` fights of one class and level against a
+    given enemy dict (not just a named template), for tools that try out
+    new enemy stats. Deterministic matchups are solved once.
+    """
+    character = build_character(character_class, level)
+    if combat_system.can_resolve_analytically(character, enemy, POLICIES[policy]):
+        outcome = combat_system.resolve_battle_analytically(character, dict(enemy), POLICIES[policy],
+                                                            max_turns=max_turns)
+        return _repeated_stats(outcome, battles)
+
+    # Seeds depend on the enemy's battle stats so each distinct fight gets its
+    # own dice, while reward-only changes replay the same fights
+    stat_key = battle_key(enemy)
+    stats = _empty_stats()
+    for i in range(battles):
+        seed_i = combat_system.derive_seed(seed, character_class, level, stat_key, i)
+        character = build_character(character_class, level)
+        result = combat_system.run_headless_battle(character, dict(enemy), POLICIES[policy],
+                                                   max_turns=max_turns, seed=seed_i)
+        _add_battle(stats, result, character["health"])
+    return stats
+
+
+def battle_key(enemy):
+    """The enemy's BATTLE_STATS as a string, for seeds and cache keys."""
+    return ",".join(str(enemy[stat]) for stat in BATTLE_STATS)
+
+
+def _add_battle(stats, result, hp):
+    stats["battles"] += 1
+    stats["wins"] += result["winner"] == "player"
+    stats["draws"] += result["winner"] == "draw"
+    stats["turns"] += result["turns"]
+    stats["turns_sq"] += result["turns"] ** 2
+    stats["hp"] += hp
+    stats["hp_sq"] += hp ** 2
+
+def _repeated_stats(outcome, battles):
+    # Statistics for `battles` identical fights
+    hp = outcome["player_health"]
+    turns = outcome["turns"]
+    if turns is None:
+        raise ValueError("This matchup never ends; set max_turns to count it as a draw.")
+    return {
+        "battles": battles,
+        "wins": battles * (outcome["winner"] == "player"),
+        "draws": battles * (outcome["winner"] == "draw"),
+        "turns": battles * turns,
+        "turns_sq": battles * turns * turns,
+        "hp": battles * hp,
+        "hp_sq": battles * hp * hp,
+    }
+
+# ============================================================================
+# STATISTICS
+# ============================================================================
+
+def wilson_interval(successes, n, z=Z_95):
+    """Confidence interval for a win rate (stays inside 0..1 even at the extremes)."""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    spread = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+def mean_interval(total, total_sq, n, z=Z_95):
+    """Mean and confidence interval from a running sum and sum of squares."""
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    mean = total / n
+    variance = max(0.0, total_sq / n - mean * mean)
+    if n > 1:
+        variance *= n / (n - 1)
+    spread = z * math.sqrt(variance / n)
+    return mean, mean - spread, mean + spread
+
+
+def summarize(cell, stats):
+    n = stats["battles"]
+    low, high = wilson_interval(stats["wins"], n)
+    turns, turns_low, turns_high = mean_interval(stats["turns"], stats["turns_sq"], n)
+    hp, hp_low, hp_high = mean_interval(stats["hp"], stats["hp_sq"], n)
+    return {
+        "class": cell[0],
+        "level": cell[1],
+        "enemy": cell[2],
+        "battles": n,
+        "win_rate": stats["wins"] / n if n else 0.0,
+        "win_rate_ci": [low, high],
+        "draws": stats["draws"],
+        "mean_turns": turns,
+        "mean_turns_ci": [turns_low, turns_high],
+        "mean_hp_remaining": hp,
+        "mean_hp_remaining_ci": [hp_low, hp_high],
+    }
+
+# ============================================================================
+# SIMULATION
+# ============================================================================
+
+def simulate(battles=1000, classes=None, levels=None, enemies=None, policy="attack",
+             workers=None, seed=0, chunk_size=250, max_turns=1000):
+    """
+    Simulate `battles` fights for every (class, level, enemy) cell.
+    Returns one summary dict per cell, in grid order.
+    """
+    classes = classes or DEFAULT_CLASSES
+    levels = levels or [1]
+    enemies = enemies or DEFAULT_ENEMIES
+
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy '{policy}'. Choose from: {', '.join(POLICIES)}")
+
+    cells = [(c, lvl, e) for c in classes for lvl in levels for e in enemies]
+    totals = {cell: _empty_stats() for cell in cells}
+
+    tasks = []
+    for cell in cells:
+        # Cells without randomness play out the same every time: solve once
+        character = build_character(cell[0], cell[1])
+        enemy = combat_system.create_enemy(cell[2])
+        if combat_system.can_resolve_analytically(character, enemy, POLICIES[policy]):
+            outcome = combat_system.resolve_battle_analytically(character, enemy, POLICIES[policy],
+                                                                max_turns=max_turns)
+            totals[cell] = _repeated_stats(outcome, battles)
+            continue
+
+        for start in range(0, battles, chunk_size):
+            count = min(chunk_size, battles - start)
+            tasks.append((cell, start, count, seed, policy, max_turns))
+
+    def collect(results):
+        for cell, stats in results:
+            for key, value in stats.items():
+                totals[cell][key] += value
+
+    if workers == 1 or not tasks:
+        collect(map(run_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            collect(pool.map(run_chunk, tasks))
+
+    return [summarize(cell, totals[cell]) for cell in cells]
+
+# ============================================================================
+# VECTORIZED SIMULATION
+# ============================================================================
+# Holds N battles as numpy arrays and advances all of them one turn per step,
+# using the same rules as SimpleBattle:
+#   basic attack:  max(1, strength - defender_strength // 4), health floors at 0
+#   Warrior/Mage:  2 x strength / 2 x magic, no floor on enemy health
+#   Rogue:         3 x strength on a 50% roll, otherwise nothing
+#   Cleric:        heal min(30, missing health)
+# The enemy always answers with a basic attack. Escaping is not simulated.
+
+CLASS_CODES = {"warrior": 0, "mage": 1, "rogue": 2, "cleric": 3}
+WINNER_CODES = {"player": 1, "enemy": 2, "draw": 3}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The vectorized simulator needs numpy (pip install numpy).")
+
+
+def simulate_battles_vectorized(characters, enemies, policy="attack", seed=None, max_turns=1000):
+    """
+    Fight characters[i] against enemies[i] for every i at once.
+    Returns numpy arrays: winner (WINNER_CODES), turns, player_hp, enemy_hp.
+    seed may be an int or a numpy Generator.
+    """
+    _require_numpy()
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy '{policy}'. Choose from: {', '.join(POLICIES)}")
+
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    p_hp = np.array([c["health"] for c in characters], dtype=np.int64)
+    p_max = np.array([c["max_health"] for c in characters], dtype=np.int64)
+    p_str = np.array([c["strength"] for c in characters], dtype=np.int64)
+    p_mag = np.array([c["magic"] for c in characters], dtype=np.int64)
+    p_cls = np.array([CLASS_CODES.get(c["class"].lower(), -1) for c in characters], dtype=np.int64)
+    e_hp = np.array([e["health"] for e in enemies], dtype=np.int64)
+    e_str = np.array([e["strength"] for e in enemies], dtype=np.int64)
+
+    n = len(p_hp)
+    winner = np.zeros(n, dtype=np.int8)
+    turns = np.ones(n, dtype=np.int64)
+    active = p_hp > 0
+
+    # Damage per hit never changes during a fight, so work it out once
+    player_hit = np.maximum(1, p_str - e_str // 4)
+    enemy_hit = np.maximum(1, e_str - p_str // 4)
+
+    turn = 1
+    while active.any():
+        # Player action
+        if policy == "attack":
+            e_hp = np.where(active, np.maximum(0, e_hp - player_hit), e_hp)
+        else:
+            damage = np.zeros(n, dtype=np.int64)
+            damage = np.where(p_cls == 0, 2 * p_str, damage)
+            damage = np.where(p_cls == 1, 2 * p_mag, damage)
+            crit = rng.random(n) < 0.5
+            damage = np.where((p_cls == 2) & crit, 3 * p_str, damage)
+            e_hp = np.where(active, e_hp - damage, e_hp)
+
+            heal = np.minimum(30, p_max - p_hp)
+            p_hp = np.where(active & (p_cls == 3), p_hp + heal, p_hp)
+
+        won = active & (e_hp <= 0)
+        winner[won] = WINNER_CODES["player"]
+        active &= ~won
+
+        # Enemy answer
+        p_hp = np.where(active, np.maximum(0, p_hp - enemy_hit), p_hp)
+        lost = active & (p_hp <= 0)
+        winner[lost] = WINNER_CODES["enemy"]
+        active &= ~lost
+
+        turn += 1
+        turns[active] = turn
+        if turn > max_turns:
+            winner[active] = WINNER_CODES["draw"]
+            break
+
+    return {"winner": winner, "turns": turns, "player_hp": p_hp, "enemy_hp": e_hp}
+
+
+def simulate_cell_vectorized(character_class, level, enemy_type, battles=1000,
+                             policy="attack", seed=0, max_turns=1000):
+    """Vectorized version of one simulate() cell, returning the same summary."""
+    _require_numpy()
+    character = build_character(character_class, level)
+    enemy = combat_system.create_enemy(enemy_type)
+
+    rng = np.random.default_rng(combat_system.derive_seed(seed, character_class, level, enemy_type))
+    result = simulate_battles_vectorized(
+        [character] * battles, [enemy] * battles, policy, rng, max_turns
+    )
+
+    turns = result["turns"]
+    hp = result["player_hp"]
+    stats = {
+        "battles": battles,
+        "wins": int((result["winner"] == WINNER_CODES["player"]).sum()),
+        "draws": int((result["winner"] == WINNER_CODES["draw"]).sum()),
+        "turns": int(turns.sum()),
+        "turns_sq": int((turns * turns).sum()),
+        "hp": int(hp.sum()),
+        "hp_sq": int((hp * hp).sum()),
+    }
+    return summarize((character_class, level, enemy_type), stats)
+
+
+def simulate_vectorized(battles=1000, classes=None, levels=None, enemies=None,
+                        policy="attack", seed=0, max_turns=1000):
+    """Same grid and output as simulate(), run with numpy in this process."""
+    classes = classes or DEFAULT_CLASSES
+    levels = levels or [1]
+    enemies = enemies or DEFAULT_ENEMIES
+    return [
+        simulate_cell_vectorized(c, lvl, e, battles, policy, seed, max_turns)
+        for c in classes for lvl in levels for e in enemies
+    ]
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def parse_levels(tokens):
+    """Turn ["1-3", "7"] into [1, 2, 3, 7]."""
+    levels = []
+    for token in tokens:
+        if "-" in token:
+            low, high = token.split("-", 1)
+            levels.extend(range(int(low), int(high) + 1))
+        else:
+            levels.append(int(token))
+    return levels
+
+
+def print_table(rows):
+    print(f"{'class':<8}{'lvl':>4} {'enemy':<8}{'win %':>8}{'95% CI':>16}{'turns':>8}{'hp left':>9}")
+    for row in rows:
+        low, high = row["win_rate_ci"]
+        print(
+            f"{row['class']:<8}{row['level']:>4} {row['enemy']:<8}"
+            f"{row['win_rate'] * 100:>7.1f}%"
+            f"{f'{low * 100:.1f}-{high * 100:.1f}':>16}"
+            f"{row['mean_turns']:>8.2f}{row['mean_hp_remaining']:>9.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m combat_system simulate",
+                                     description="Monte Carlo battle simulation.")
+    parser.add_argument("--battles", type=int, default=1000, help="battles per cell")
+    parser.add_argument("--classes", nargs="+", default=DEFAULT_CLASSES)
+    parser.add_argument("--levels", nargs="+", default=["1"], help="levels or ranges like 1-10")
+    parser.add_argument("--enemies", nargs="+", default=DEFAULT_ENEMIES)
+    parser.add_argument("--policy", choices=list(POLICIES), default="attack")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--engine", choices=["scalar", "vectorized"], default="scalar",
+                        help="vectorized needs numpy and ignores --workers")
+    parser.add_argument("--json", help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    settings = dict(
+        battles=args.battles,
+        classes=args.classes,
+        levels=parse_levels(args.levels),
+        enemies=args.enemies,
+        policy=args.policy,
+        seed=args.seed,
+        max_turns=args.max_turns,
+    )
+    if args.engine == "vectorized":
+        rows = simulate_vectorized(**settings)
+    else:
+        rows = simulate(workers=args.workers, **settings)
+    print_table(rows)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Results written to {args.json}")
@@ -8,7 +8,12 @@ AI Usage: simplified logic, ensured compatibility with assignment structure, hel
 Handles combat mechanics
 """
 
+import hashlib
+import os
 import random
+import sys
+
+import game_data
 from custom_exceptions import (
     InvalidTargetError,
     CombatNotActiveError,
@@ -21,43 +26,71 @@ from custom_exceptions import (
 # ENEMY DEFINITIONS
 # ============================================================================
 
+# Enemies come from data/enemies.txt. The file is read once, the first time an
+# enemy is needed, and turned into ready-made template dicts; create_enemy
+# only copies a template.
+ENEMY_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "enemies.txt")
+
+_enemy_templates = None
+
+
+def load_enemy_templates(filename=ENEMY_DATA_FILE):
+    """(Re)load the enemy catalog and rebuild the templates."""
+    global _enemy_templates
+
+    templates = {}
+    for enemy_id, data in game_data.load_enemies(filename).items():
+        templates[enemy_id] = {
+            "enemy_id": enemy_id,
+            "name": data["name"],
+            "health": data["health"],
+            "max_health": data["health"],
+            "strength": data["strength"],
+            "magic": data["magic"],
+            "xp_reward": data["xp_reward"],
+            "gold_reward": data["gold_reward"]
+        }
+
+    _enemy_templates = templates
+    return templates
+
+
+def get_enemy_templates():
+    if _enemy_templates is None:
+        load_enemy_templates()
+    return _enemy_templates
+
+
 def create_enemy(enemy_type):
     """Create enemy by type."""
-    
-    types = {
-        "goblin": {
-            "name": "Goblin",
-            "health": 50,
-            "max_health": 50,
-            "strength": 8,
-            "magic": 2,
-            "xp_reward": 25,
-            "gold_reward": 10
-        },
-        "orc": {
-            "name": "Orc",
-            "health": 80,
-            "max_health": 80,
-            "strength": 12,
-            "magic": 5,
-            "xp_reward": 50,
-            "gold_reward": 25
-        },
-        "dragon": {
-            "name": "Dragon",
-            "health": 200,
-            "max_health": 200,
-            "strength": 25,
-            "magic": 15,
-            "xp_reward": 200,
-            "gold_reward": 100
-        }
-    }
+    templates = _enemy_templates if _enemy_templates is not None else get_enemy_templates()
 
-    if enemy_type not in types:
+    template = templates.get(enemy_type)
+    if template is None:
         raise InvalidTargetError(f"Unknown enemy type: {enemy_type}")
 
-    return types[enemy_type].copy()
+    return template.copy()
+
+
+class EnemyPool:
+    """
+    Recycles enemy dicts for high-volume simulations.
+    release() a finished enemy and the next acquire() of that type resets and
+    reuses it instead of allocating a new dict.
+    """
+    def __init__(self):
+        self._free = {}
+
+    def acquire(self, enemy_type):
+        free = self._free.get(enemy_type)
+        if free:
+            enemy = free.pop()
+            enemy.update(get_enemy_templates()[enemy_type])
+            return enemy
+        return create_enemy(enemy_type)
+
+    def release(self, enemy):
+        self._free.setdefault(enemy["enemy_id"], []).append(enemy)
 
 
 def get_random_enemy_for_level(character_level):
@@ -70,6 +103,194 @@ def get_random_enemy_for_level(character_level):
         return create_enemy("dragon")
 
 
+# ============================================================================
+# RANDOM NUMBER STREAMS
+# ============================================================================
+# Every battle draws from its own random.Random, never the shared module-level
+# generator, so battles running side by side cannot disturb each other and
+# any battle can be replayed from its seed.
+
+_seed_source = random.SystemRandom()
+
+
+def new_battle_seed():
+    """Pick a fresh 64-bit seed for a battle that was not given one."""
+    return _seed_source.getrandbits(64)
+
+
+def derive_seed(parent_seed, *keys):
+    """
+    Derive an independent 64-bit child seed from a parent seed and keys,
+    e.g. derive_seed(run_seed, "worker", 3). Uses a hash rather than hash()
+    so every process derives the same value.
+    """
+    text = ":".join(str(part) for part in (parent_seed,) + keys)
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def spawn_seeds(parent_seed, count):
+    """Child seeds for `count` workers or battles; also valid numpy seeds."""
+    return [derive_seed(parent_seed, i) for i in range(count)]
+
+# ============================================================================
+# PLAYER ACTION POLICIES
+# ============================================================================
+# A policy picks the player's action each turn. It can be a function that
+# takes the battle, or any object with a choose_action(battle) method.
+# Actions are ATTACK, SPECIAL or ESCAPE; anything else wastes the turn.
+
+ATTACK = "attack"
+SPECIAL = "special"
+ESCAPE = "escape"
+
+MENU_CHOICES = {"1": ATTACK, "2": SPECIAL, "3": ESCAPE}
+
+
+def interactive_policy(battle):
+    """Ask the player at the keyboard (the classic game behaviour)."""
+    print("\nYour turn:")
+    print("1. Basic Attack")
+    print("2. Special Ability")
+    print("3. Run Away")
+
+    choice = input("Choose an action: ")
+    return MENU_CHOICES.get(choice, choice)
+
+
+class FixedActionPolicy:
+    """Strategy that always picks the same action."""
+    def __init__(self, action):
+        self.action = action
+
+    def choose_action(self, battle):
+        return self.action
+
+
+ALWAYS_ATTACK = FixedActionPolicy(ATTACK)
+ALWAYS_SPECIAL = FixedActionPolicy(SPECIAL)
+
+
+def _as_policy(policy):
+    # Accept strategy objects as well as plain functions
+    choose = getattr(policy, "choose_action", None)
+    return choose if choose is not None else policy
+
+# ============================================================================
+# BATTLE EVENTS
+# ============================================================================
+# The battle never prints directly. It hands event dicts such as
+# {"type": "attack", "turn": 3, "actor": "player", "damage": 12} to a sink.
+# Each event has a verbosity level, and the battle only builds events up to
+# its sink's level, so a silent sink costs nothing. A sink is a BattleSink
+# below or any plain function taking one event (treated as LOG_DEBUG).
+
+LOG_SILENT = 0   # nothing
+LOG_SUMMARY = 1  # battle start, rewards and result
+LOG_ACTIONS = 2  # plus turn headers and every action
+LOG_DEBUG = 3    # plus HP after every action (the classic console output)
+
+EVENT_LEVELS = {
+    "start": LOG_SUMMARY,
+    "rewards": LOG_SUMMARY,
+    "end": LOG_SUMMARY,
+    "turn": LOG_ACTIONS,
+    "attack": LOG_ACTIONS,
+    "special": LOG_ACTIONS,
+    "escape": LOG_ACTIONS,
+    "wasted": LOG_ACTIONS,
+    "stats": LOG_DEBUG,
+}
+
+
+def format_battle_event(event):
+    """Return the console text for an event, or None if it shows nothing."""
+    kind = event["type"]
+
+    if kind == "start":
+        return ">>> Battle begins!"
+    if kind == "turn":
+        return f">>> --- Turn {event['turn']} ---"
+    if kind == "attack":
+        if event["actor"] == "player":
+            return f">>> You dealt {event['damage']} damage!"
+        return f">>> {event['actor']} dealt {event['damage']} damage!"
+    if kind == "special":
+        return f">>> {format_special_message(event['ability'], event['amount'])}"
+    if kind == "escape":
+        return ">>> You escaped successfully!" if event["success"] else ">>> Escape failed!"
+    if kind == "wasted":
+        return ">>> Invalid choice. Turn wasted."
+    if kind == "stats":
+        return (f"\n{event['character']}: {event['health']}/{event['max_health']}\n"
+                f"{event['enemy']}: {event['enemy_health']}/{event['enemy_max_health']}")
+    if kind == "rewards":
+        return f">>> You gained {event['xp']} XP and {event['gold']} gold!"
+    return None
+
+
+class BattleSink:
+    """Base sink: takes events up to `level`; flush() is called when a battle ends."""
+    level = LOG_DEBUG
+
+    def __init__(self, level=None):
+        if level is not None:
+            self.level = level
+
+    def __call__(self, event):
+        self.emit(event)
+
+    def emit(self, event):
+        pass
+
+    def flush(self):
+        pass
+
+
+class NullSink(BattleSink):
+    """Drops everything; battles skip building events entirely."""
+    level = LOG_SILENT
+
+
+class ConsoleSink(BattleSink):
+    """Prints each event as it happens."""
+    def emit(self, event):
+        text = format_battle_event(event)
+        if text is not None:
+            print(text)
+
+
+class BufferedTextSink(BattleSink):
+    """Collects a battle's text and writes it in one go when the battle ends."""
+    def __init__(self, level=None, stream=None):
+        super().__init__(level)
+        self.stream = stream
+        self.lines = []
+
+    def emit(self, event):
+        text = format_battle_event(event)
+        if text is not None:
+            self.lines.append(text)
+
+    def flush(self):
+        if self.lines:
+            stream = self.stream if self.stream is not None else sys.stdout
+            stream.write("\n".join(self.lines) + "\n")
+            self.lines = []
+
+
+class StructuredEventSink(BattleSink):
+    """Keeps the raw event dicts for servers, replays and analysis."""
+    def __init__(self, level=None):
+        super().__init__(level)
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+
+console_sink = ConsoleSink()
+null_sink = NullSink()
+
 # ============================================================================
 # COMBAT SYSTEM
 # ============================================================================
@@ -77,88 +298,115 @@ def get_random_enemy_for_level(character_level):
 class SimpleBattle:
     """Turn-based combat manager."""
     # Initializes the battle instance with the player, enemy, and starting values.
-    def __init__(self, character, enemy):
+    # policy picks player actions (keyboard by default), sink receives battle
+    # events (console by default), and max_turns ends endless fights in a draw.
+    # Randomness comes from rng, or from a new random.Random(seed); with
+    # neither given a fresh seed is picked and kept so the battle can be replayed.
+    def __init__(self, character, enemy, policy=None, sink=None, max_turns=None, rng=None, seed=None):
         self.character = character
         self.enemy = enemy
         self.combat_active = True
         self.turn = 1
+        self.winner = None
+        self.policy = _as_policy(policy if policy is not None else interactive_policy)
+        self.sink = sink if sink is not None else console_sink
+        self.log_level = getattr(self.sink, "level", LOG_DEBUG)
+        self.max_turns = max_turns
+
+        if rng is None:
+            if seed is None:
+                seed = new_battle_seed()
+            rng = random.Random(seed)
+        self.rng = rng
+        self.seed = seed
 
     def start_battle(self):
+        self.begin_battle()
+
+        while self.combat_active:
+            self.play_round()
+
+        return self.finish_battle()
+
+    def begin_battle(self):
         if self.character["health"] <= 0:
             raise CharacterDeadError("The character is already dead and cannot fight.")
 
-        display_battle_log("Battle begins!")
-        display_combat_stats(self.character, self.enemy)
+        self._emit("start")
+        self._emit_stats()
 
-        while self.combat_active:
-            display_battle_log(f"--- Turn {self.turn} ---")
+    def play_round(self, action=None):
+        """
+        Play one turn: the player's action (asked from the policy if not
+        given), then the enemy's. Returns the winner once the battle is over.
+        """
+        self._emit("turn")
 
-            # Player turn
+        if action is None:
             self.player_turn()
+        else:
+            self.perform_action(action)
 
-            # Check after player action
-            result = self.check_battle_end()
-            if result is not None:
-                self.combat_active = False
-                winner = result
-                break
-
-            # Enemy turn
+        winner = self._round_result()
+        if winner is None:
             self.enemy_turn()
+            winner = self._round_result()
 
-            # Check after enemy action
-            result = self.check_battle_end()
-            if result is not None:
-                self.combat_active = False
-                winner = result
-                break
-
+        if winner is None:
             self.turn += 1
+            if self.max_turns is not None and self.turn > self.max_turns:
+                winner = "draw"
+
+        if winner is not None:
+            self.combat_active = False
+            self.winner = winner
+        return winner
 
-        # After battle ends
-        if winner == "player":
+    def finish_battle(self):
+        if self.winner == "player":
             rewards = get_victory_rewards(self.enemy)
-            display_battle_log(f"You gained {rewards['xp']} XP and {rewards['gold']} gold!")
+            self._emit("rewards", xp=rewards["xp"], gold=rewards["gold"])
 
             self.character["experience"] += rewards["xp"]
             self.character["gold"] += rewards["gold"]
 
-            return {"winner": "player", **rewards}
-
+            result = {"winner": "player", **rewards, "turns": self.turn}
         else:
-            return {"winner": "enemy", "xp_gained": 0, "gold_gained": 0}
+            result = {"winner": self.winner, "xp_gained": 0, "gold_gained": 0, "turns": self.turn}
+
+        self._emit("end", winner=self.winner)
+        flush = getattr(self.sink, "flush", None)
+        if flush is not None:
+            flush()
+        return result
 
     def player_turn(self):
         if not self.combat_active:
             raise CombatNotActiveError("Combat is not active.")
 
-        print("\nYour turn:")
-        print("1. Basic Attack")
-        print("2. Special Ability")
-        print("3. Run Away")
+        self.perform_action(self.policy(self))
 
-        choice = input("Choose an action: ")
-
-        if choice == "1":
+    def perform_action(self, action):
+        if action == ATTACK:
             dmg = self.calculate_damage(self.character, self.enemy)
             self.apply_damage(self.enemy, dmg)
-            display_battle_log(f"You dealt {dmg} damage!")
+            self._emit("attack", actor="player", damage=dmg)
 
-        elif choice == "2":
-            message = use_special_ability(self.character, self.enemy)
-            display_battle_log(message)
+        elif action == SPECIAL:
+            ability, amount = perform_special_ability(self.character, self.enemy, self.rng)
+            self._emit("special", ability=ability, amount=amount)
 
-        elif choice == "3":
+        elif action == ESCAPE:
             if self.attempt_escape():
-                display_battle_log("You escaped successfully!")
+                self._emit("escape", success=True)
                 return
             else:
-                display_battle_log("Escape failed!")
+                self._emit("escape", success=False)
 
         else:
-            display_battle_log("Invalid choice. Turn wasted.")
+            self._emit("wasted", action=action)
 
-        display_combat_stats(self.character, self.enemy)
+        self._emit_stats()
 
     def enemy_turn(self):
         if not self.combat_active:
@@ -166,8 +414,8 @@ class SimpleBattle:
 
         dmg = self.calculate_damage(self.enemy, self.character)
         self.apply_damage(self.character, dmg)
-        display_battle_log(f"{self.enemy['name']} dealt {dmg} damage!")
-        display_combat_stats(self.character, self.enemy)
+        self._emit("attack", actor=self.enemy["name"], damage=dmg)
+        self._emit_stats()
 
     def calculate_damage(self, attacker, defender):
         raw = attacker["strength"] - (defender["strength"] // 4)
@@ -184,56 +432,263 @@ class SimpleBattle:
         return None
 
     def attempt_escape(self):
-        success = random.random() < 0.5
+        success = self.rng.random() < 0.5
         if success:
             self.combat_active = False
         return success
 
+    def _round_result(self):
+        # A successful escape switches combat off before anyone dies
+        if not self.combat_active:
+            return "escaped"
+        return self.check_battle_end()
+
+    def _emit(self, event_type, **data):
+        if EVENT_LEVELS[event_type] > self.log_level:
+            return
+        data["type"] = event_type
+        data["turn"] = self.turn
+        self.sink(data)
+
+    def _emit_stats(self):
+        if self.log_level < LOG_DEBUG:
+            return
+        self._emit(
+            "stats",
+            character=self.character["name"],
+            health=self.character["health"],
+            max_health=self.character["max_health"],
+            enemy=self.enemy["name"],
+            enemy_health=self.enemy["health"],
+            enemy_max_health=self.enemy["max_health"],
+        )
+
+
+def run_headless_battle(character, enemy, policy=ALWAYS_ATTACK, sink=null_sink, max_turns=1000,
+                        rng=None, seed=None):
+    """Fight a battle with no keyboard or screen; returns the battle result."""
+    battle = SimpleBattle(character, enemy, policy=policy, sink=sink, max_turns=max_turns,
+                          rng=rng, seed=seed)
+    return battle.start_battle()
+
+
+# ============================================================================
+# ANALYTIC RESOLUTION
+# ============================================================================
+# With a fixed action and no dice, every exchange deals the same damage, so
+# the outcome follows from two ceiling divisions instead of a turn loop.
+
+def _fixed_player_damage(character, enemy, action):
+    """Damage the player deals every turn, or None if it is not fixed."""
+    if action == ATTACK:
+        return max(1, character["strength"] - enemy["strength"] // 4)
+
+    if action == SPECIAL:
+        cls = character["class"].lower()
+        if cls == "warrior":
+            return character["strength"] * 2
+        if cls == "mage":
+            return character["magic"] * 2
+        if cls == "rogue":
+            return None  # Critical strikes are random
+        return 0  # Cleric heals instead; other classes have no special
+
+    return None
+
+
+def can_resolve_analytically(character, enemy, policy):
+    """True if resolve_battle_analytically can skip playing this battle."""
+    return (isinstance(policy, FixedActionPolicy)
+            and _fixed_player_damage(character, enemy, policy.action) is not None)
+
+
+def resolve_battle_analytically(character, enemy, policy=ALWAYS_ATTACK, max_turns=None, seed=None):
+    """
+    Work out a battle's result without playing it and without changing the
+    character or enemy. Returns winner, turns, player_health, enemy_health and
+    whether the shortcut applied ("analytic"). Policies that are not a fixed
+    deterministic action fall back to simulating on copies. A fight that can
+    never end (and has no max_turns) is a draw with turns None.
+    """
+    if character["health"] <= 0:
+        raise CharacterDeadError("The character is already dead and cannot fight.")
+
+    action = policy.action if isinstance(policy, FixedActionPolicy) else None
+    player_hit = _fixed_player_damage(character, enemy, action)
+
+    if player_hit is None:
+        player = dict(character)
+        foe = dict(enemy)
+        result = run_headless_battle(player, foe, policy, max_turns=max_turns, seed=seed)
+        return {
+            "winner": result["winner"],
+            "turns": result["turns"],
+            "player_health": player["health"],
+            "enemy_health": foe["health"],
+            "analytic": False,
+        }
+
+    enemy_hit = max(1, enemy["strength"] - character["strength"] // 4)
+    player_hp = character["health"]
+    enemy_hp = enemy["health"]
+
+    if action == SPECIAL and character["class"].lower() == "cleric":
+        return _resolve_cleric_heals(character, enemy_hp, enemy_hit, max_turns)
+
+    # Hits each side needs; the player swings first every turn
+    player_needs = -(-enemy_hp // player_hit) if player_hit > 0 else None
+    enemy_needs = -(-player_hp // enemy_hit)
+
+    if player_needs is not None and player_needs <= enemy_needs:
+        winner, turns = "player", player_needs
+    else:
+        winner, turns = "enemy", enemy_needs
+
+    if max_turns is not None and turns > max_turns:
+        winner, turns = "draw", max_turns + 1
+        player_hp -= max_turns * enemy_hit
+        enemy_hp -= max_turns * player_hit
+    elif winner == "player":
+        player_hp -= (turns - 1) * enemy_hit
+        enemy_hp -= turns * player_hit
+    else:
+        player_hp = 0
+        enemy_hp -= turns * player_hit
+
+    # Basic attacks stop at 0 HP; Power Strike and Fireball can overkill
+    if action == ATTACK:
+        enemy_hp = max(0, enemy_hp)
+
+    return {
+        "winner": winner,
+        "turns": turns,
+        "player_health": player_hp,
+        "enemy_health": enemy_hp,
+        "analytic": True,
+    }
+
+
+def _resolve_cleric_heals(character, enemy_hp, enemy_hit, max_turns):
+    # A Cleric that only heals never hurts the enemy. Each turn it heals
+    # min(30, missing HP) and then takes enemy_hit.
+    player_hp = character["health"]
+    max_health = character["max_health"]
+    first = min(player_hp + 30, max_health) - enemy_hit  # HP after turn 1
+
+    if first <= 0:
+        winner, turns, player_hp = "enemy", 1, 0
+    elif enemy_hit > 30:
+        # Missing HP is now over 30, so every later turn nets 30 - enemy_hit
+        turns = 1 + -(-first // (enemy_hit - 30))
+        winner, player_hp = "enemy", 0
+    else:
+        # Heals keep up: a stalemate that only max_turns can end
+        winner, turns = "draw", None
+        if max_turns is not None:
+            turns = max_turns + 1
+            player_hp = min(first + (max_turns - 1) * (30 - enemy_hit), max_health - enemy_hit)
+        else:
+            player_hp = max_health - enemy_hit
+
+    if winner == "enemy" and max_turns is not None and turns > max_turns:
+        winner, turns = "draw", max_turns + 1
+        player_hp = first - (max_turns - 1) * (enemy_hit - 30)
+
+    return {
+        "winner": winner,
+        "turns": turns,
+        "player_health": player_hp,
+        "enemy_health": enemy_hp,
+        "analytic": True,
+    }
+
 
 # ============================================================================
 # SPECIAL ABILITIES
 # ============================================================================
 
-def use_special_ability(character, enemy):
+# Each ability has a quiet form that only changes stats and returns the
+# amount, so battles that log nothing never build the message string.
+
+def perform_special_ability(character, enemy, rng=None):
+    """Apply the class special. Returns (ability, amount) without a message."""
     cls = character["class"].lower()
 
     if cls == "warrior":
-        return warrior_power_strike(character, enemy)
+        return "power_strike", _power_strike(character, enemy)
     elif cls == "mage":
-        return mage_fireball(character, enemy)
+        return "fireball", _fireball(character, enemy)
     elif cls == "rogue":
-        return rogue_critical_strike(character, enemy)
+        return "critical_strike", _critical_strike(character, enemy, rng)
     elif cls == "cleric":
-        return cleric_heal(character)
+        return "heal", _heal(character)
     else:
-        return "Your class has no special ability."
+        return None, 0
+
+
+def format_special_message(ability, amount):
+    if ability == "power_strike":
+        return f"Power Strike! You dealt {amount} damage."
+    if ability == "fireball":
+        return f"Fireball! You scorched the enemy for {amount} damage."
+    if ability == "critical_strike":
+        if amount:
+            return f"Critical Strike! Massive {amount} damage!"
+        return "Critical Strike failed! No bonus damage."
+    if ability == "heal":
+        return f"You healed for {amount} HP."
+    return "Your class has no special ability."
+
+
+def use_special_ability(character, enemy, rng=None):
+    ability, amount = perform_special_ability(character, enemy, rng)
+    return format_special_message(ability, amount)
 
 
 def warrior_power_strike(character, enemy):
+    return format_special_message("power_strike", _power_strike(character, enemy))
+
+
+def mage_fireball(character, enemy):
+    return format_special_message("fireball", _fireball(character, enemy))
+
+
+def rogue_critical_strike(character, enemy, rng=None):
+    return format_special_message("critical_strike", _critical_strike(character, enemy, rng))
+
+
+def cleric_heal(character):
+    return format_special_message("heal", _heal(character))
+
+
+def _power_strike(character, enemy):
     dmg = character["strength"] * 2
     enemy["health"] -= dmg
-    return f"Power Strike! You dealt {dmg} damage."
+    return dmg
 
 
-def mage_fireball(character, enemy):
+def _fireball(character, enemy):
     dmg = character["magic"] * 2
     enemy["health"] -= dmg
-    return f"Fireball! You scorched the enemy for {dmg} damage."
+    return dmg
+
 
+def _critical_strike(character, enemy, rng=None):
+    # Outside a battle fall back to the module-level generator
+    if rng is None:
+        rng = random
 
-def rogue_critical_strike(character, enemy):
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         dmg = character["strength"] * 3
         enemy["health"] -= dmg
-        return f"Critical Strike! Massive {dmg} damage!"
-    else:
-        return "Critical Strike failed! No bonus damage."
+        return dmg
+    return 0
 
 
-def cleric_heal(character):
+def _heal(character):
     healed = min(30, character["max_health"] - character["health"])
     character["health"] += healed
-    return f"You healed for {healed} HP."
+    return healed
 
 
 # ============================================================================
@@ -265,4 +720,13 @@ def display_battle_log(message):
 # ============================================================================
 
 if __name__ == "__main__":
-    print("=== COMBAT SYSTEM TEST ===")
+    # python -m combat_system simulate ... runs the Monte Carlo simulator
+    # python -m combat_system tune ... runs the enemy stat grid search
+    if len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        import combat_simulation
+        combat_simulation.main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "tune":
+        import balance_tuning
+        balance_tuning.main(sys.argv[2:])
+    else:
+        print("=== COMBAT SYSTEM TEST ===")
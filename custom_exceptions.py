@@ -80,6 +80,10 @@ class AbilityOnCooldownError(CombatError):
     """Raised when trying to use an ability that's on cooldown"""
     pass
 
+class ReplayMismatchError(CombatError):
+    """Raised when a replayed battle does not match its recording"""
+    pass
+
 # Quest Exceptions
 class QuestNotFoundError(QuestError):
     """Raised when trying to access a quest that doesn't exist"""
@@ -97,6 +101,10 @@ class QuestNotActiveError(QuestError):
     """Raised when trying to complete a quest that isn't active"""
     pass
 
+class CircularPrerequisiteError(QuestError):
+    """Raised when quest prerequisites loop back on themselves"""
+    pass
+
 # Inventory Exceptions
 class InventoryFullError(InventoryError):
     """Raised when trying to add items to a full inventory"""
@@ -10,14 +10,17 @@ import os
 from custom_exceptions import (
     InvalidDataFormatError,
     MissingDataFileError,
-    CorruptedDataError
+    CorruptedDataError,
+    QuestError
 )
+from inventory_system import compile_item_effect
+from quest_handler import validate_quest_prerequisites
 
 # ============================================================================
 # DATA LOADING FUNCTIONS
 # ============================================================================
 
-def load_quests(filename="data/quests.txt"):
+def load_quests(filename="data/quests.txt", max_level=None):
     """Load quests from file and return dict."""
     
     # 1. Check if the file exists before trying to open it.
@@ -58,6 +61,13 @@ def load_quests(filename="data/quests.txt"):
         # Add to the main dictionary using the quest_id as the lookup key.
         quests[quest_dict["quest_id"]] = quest_dict
 
+    # 6. Check the quests fit together: every prerequisite exists, none loop
+    # back on themselves, and (given a level cap) every quest can be reached.
+    try:
+        validate_quest_prerequisites(quests, max_level)
+    except QuestError as e:
+        raise InvalidDataFormatError(f"Quest data rejected: {e}")
+
     return quests
 
 
@@ -88,11 +98,41 @@ def load_items(filename="data/items.txt"):
     for block in blocks:
         item_dict = parse_item_block(block)   # Uses the item-specific parser
         validate_item_data(item_dict)         # Uses the item-specific validator
+
+        # Compile the effect once here so using the item never re-parses it
+        item_dict["effects"] = compile_item_effect(item_dict["effect"])
         items[item_dict["item_id"]] = item_dict
 
     return items
 
 
+def load_enemies(filename="data/enemies.txt"):
+    """Load enemy definitions from file and return dict."""
+    # (Same steps as load_items, with the enemy parser and validator)
+
+    if not os.path.exists(filename):
+        raise MissingDataFileError("Enemy data file missing")
+
+    try:
+        with open(filename, "r") as f:
+            raw = f.read().strip()
+    except Exception:
+        raise CorruptedDataError("Enemy file unreadable")
+
+    if not raw:
+        raise InvalidDataFormatError("Enemy file empty")
+
+    blocks = [b.strip().split("\n") for b in raw.split("\n\n") if b.strip()]
+    enemies = {}
+
+    for block in blocks:
+        enemy_dict = parse_enemy_block(block)
+        validate_enemy_data(enemy_dict)
+        enemies[enemy_dict["enemy_id"]] = enemy_dict
+
+    return enemies
+
+
 def validate_quest_data(q):
     """Ensure quest dict has required fields and correct types."""
     # List of keys that MUST be present in the dictionary.
@@ -113,6 +153,12 @@ def validate_quest_data(q):
         if not isinstance(q[n], int):
             raise InvalidDataFormatError("Quest numeric field invalid")
 
+    # "a,b" needs both quests and "a|b" either one; no part may be blank
+    prereq = q["prerequisite"]
+    if prereq != "NONE" and any(not part.strip() for option in prereq.split("|")
+                                for part in option.split(",")):
+        raise InvalidDataFormatError("Quest prerequisite list invalid")
+
     return True
 
 
@@ -133,13 +179,35 @@ def validate_item_data(i):
     if not isinstance(i["cost"], int):
         raise InvalidDataFormatError("Cost must be integer")
 
-    # Verify the effect string has a colon (e.g., "health:20").
-    if ":" not in i["effect"]:
+    # Verify the effect is one or more stat:value pairs (e.g., "health:20,strength:5").
+    try:
+        compile_item_effect(i["effect"])
+    except ValueError:
         raise InvalidDataFormatError("Invalid effect format")
 
     return True
 
 
+def validate_enemy_data(e):
+    """Ensure enemy dict is valid."""
+    required = ["enemy_id", "name", "health", "strength", "magic", "xp_reward", "gold_reward"]
+
+    for r in required:
+        if r not in e:
+            raise InvalidDataFormatError("Missing enemy field")
+
+    numeric_fields = ["health", "strength", "magic", "xp_reward", "gold_reward"]
+    for n in numeric_fields:
+        if not isinstance(e[n], int):
+            raise InvalidDataFormatError("Enemy numeric field invalid")
+
+    # An enemy that starts dead would end every battle before it begins
+    if e["health"] <= 0:
+        raise InvalidDataFormatError("Enemy health must be positive")
+
+    return True
+
+
 def create_default_data_files():
     """Create default quests and items files."""
     try:
@@ -171,6 +239,18 @@ def create_default_data_files():
                     "DESCRIPTION: Restores a small amount of health.\n"
                 )
 
+        # If enemies.txt is missing, write the three classic enemies.
+        if not os.path.exists("data/enemies.txt"):
+            with open("data/enemies.txt", "w") as f:
+                f.write(
+                    "ENEMY_ID: goblin\nNAME: Goblin\nHEALTH: 50\nSTRENGTH: 8\nMAGIC: 2\n"
+                    "XP_REWARD: 25\nGOLD_REWARD: 10\n\n"
+                    "ENEMY_ID: orc\nNAME: Orc\nHEALTH: 80\nSTRENGTH: 12\nMAGIC: 5\n"
+                    "XP_REWARD: 50\nGOLD_REWARD: 25\n\n"
+                    "ENEMY_ID: dragon\nNAME: Dragon\nHEALTH: 200\nSTRENGTH: 25\nMAGIC: 15\n"
+                    "XP_REWARD: 200\nGOLD_REWARD: 100\n"
+                )
+
     except Exception:
         # If we can't write the files (e.g., disk full, permissions), raise an error.
         raise CorruptedDataError("Unable to create default files")
@@ -266,3 +346,32 @@ def parse_item_block(lines):
         raise InvalidDataFormatError("Unable to parse item")
 
     return item
+
+
+def parse_enemy_block(lines):
+    """Parse enemy block into dict."""
+    enemy = {}
+    numeric = ["health", "strength", "magic", "xp_reward", "gold_reward"]
+    try:
+        for line in lines:
+            if ": " not in line:
+                raise InvalidDataFormatError("Bad enemy line")
+
+            key, val = line.split(": ", 1)
+            key = key.lower()
+
+            # Every stat is a whole number
+            if key in numeric:
+                val = int(val)
+
+            if key == "enemy_id" or key == "name" or key in numeric:
+                enemy[key] = val
+            else:
+                raise InvalidDataFormatError("Unknown enemy field")
+
+    except ValueError:
+        raise InvalidDataFormatError("Enemy number invalid")
+    except Exception:
+        raise InvalidDataFormatError("Unable to parse enemy")
+
+    return enemy
@@ -12,133 +12,278 @@ from custom_exceptions import (
     InsufficientResourcesError,
     InvalidItemTypeError
 )
+from character_manager import character_lock, InventoryList
+import itertools
+import sys
 
 MAX_INVENTORY_SIZE = 20
-# defines what the max inventory size should be.
+# defines what the max inventory size should be (characters can override it).
+
+# How many of the same item share one slot, by item type. Items whose type
+# is unknown never stack.
+STACK_LIMITS = {"consumable": 10, "weapon": 1, "armor": 1}
 # ============================================================================
 # INVENTORY MANAGEMENT
 # ============================================================================
 
-def add_item_to_inventory(character, item_id):
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full")
-    character["inventory"].append(item_id)
-    return True
+def add_item_to_inventory(character, item_id, item_data=None):
+    with character_lock(character):
+        if not _has_room_for(character, item_id, item_data):
+            raise InventoryFullError("Inventory is full")
+        _append_item(character, item_id, item_data)
+        return True
 #
 
 def remove_item_from_inventory(character, item_id):
-    if item_id not in character["inventory"]:
-        raise ItemNotFoundError(f"Item '{item_id}' not found")
-    character["inventory"].remove(item_id)
-    return True
+    with character_lock(character):
+        if not has_item(character, item_id):
+            raise ItemNotFoundError(f"Item '{item_id}' not found")
+        _remove_item(character, item_id)
+        return True
 
 def has_item(character, item_id):
-    return item_id in character["inventory"]
+    with character_lock(character):
+        return _inventory_index(character)["counts"].get(item_id, 0) > 0
 
 def count_item(character, item_id):
-    return character["inventory"].count(item_id)
+    with character_lock(character):
+        return _inventory_index(character)["counts"].get(item_id, 0)
+
+def get_inventory_capacity(character):
+    return character.get("inventory_capacity", MAX_INVENTORY_SIZE)
+
+def set_inventory_capacity(character, capacity):
+    with character_lock(character):
+        if capacity < get_inventory_slots_used(character):
+            raise ValueError("Capacity is smaller than the slots already in use.")
+        character["inventory_capacity"] = capacity
+        return capacity
+
+def get_inventory_slots_used(character):
+    with character_lock(character):
+        return _inventory_index(character)["slots"]
 
 def get_inventory_space_remaining(character):
-    return MAX_INVENTORY_SIZE - len(character["inventory"])
+    return get_inventory_capacity(character) - get_inventory_slots_used(character)
 
 def clear_inventory(character):
-    removed = character["inventory"].copy()
-    character["inventory"].clear()
-    return removed
+    with character_lock(character):
+        removed = character["inventory"].copy()
+        character["inventory"].clear()
+        character.pop("_inventory_index", None)
+        return removed
+
+# ============================================================================
+# SLOT ACCOUNTING
+# ============================================================================
+# character["inventory"] stays a list of item IDs, one entry per item (that
+# is what gets saved); only the slot accounting is stacked. Alongside it we
+# keep per-item counts and a running used-slot total, updated by every
+# function in this module, so capacity checks never count the list. The type
+# of every item seen with its data is kept in character["item_types"] (and
+# saved), so a rebuilt index stacks items the same way as before. An
+# InventoryList counts its own changes, so if other code replaces or edits
+# it, the index notices and rebuilds itself once. A plain list assigned to
+# character["inventory"] is replaced by an InventoryList holding the same
+# items the first time the index sees it, so later edits must go through
+# character["inventory"], not the old list. Every change also
+# takes a fresh version number, which lets the inventory view cache tell
+# when it is out of date.
+
+_index_versions = itertools.count(1)
+
+def _stack_limit(character, item_id, item_data=None):
+    if item_data is not None:
+        item_type = item_data.get("type")
+    elif item_id in character.get("item_types", {}):
+        item_type = character["item_types"][item_id]
+    else:
+        item_type = character.get("item_data", {}).get(item_id, {}).get("type")
+    return character.get("stack_limits", STACK_LIMITS).get(item_type, 1)
+
+def _slots_for(count, limit):
+    return (count + limit - 1) // limit
+
+def _build_inventory_index(character):
+    inventory = character["inventory"]
+
+    counts = {}
+    for item_id in inventory:
+        counts[item_id] = counts.get(item_id, 0) + 1
+
+    limits = {}
+    slots = 0
+    for item_id, count in counts.items():
+        limits[item_id] = _stack_limit(character, item_id)
+        slots += _slots_for(count, limits[item_id])
+
+    index = {
+        "list": inventory,
+        "stamp": inventory.version,
+        "counts": counts,
+        "limits": limits,
+        "slots": slots,
+        "version": next(_index_versions),
+    }
+    character["_inventory_index"] = index
+    return index
+
+def _inventory_index(character):
+    index = character.get("_inventory_index")
+    inventory = character["inventory"]
+    if not isinstance(inventory, InventoryList):
+        inventory = character["inventory"] = InventoryList(inventory)
+    if index is None or index["list"] is not inventory or index["stamp"] != inventory.version:
+        index = _build_inventory_index(character)
+    return index
+
+def _item_limit(character, index, item_id, item_data):
+    limit = index["limits"].get(item_id)
+    if limit is not None and item_data is None:
+        return limit
+
+    # Item data passed in wins over whatever limit we guessed earlier
+    if item_data is not None and item_data.get("type") is not None:
+        character.setdefault("item_types", {})[item_id] = item_data["type"]
+    new_limit = _stack_limit(character, item_id, item_data)
+    if limit is not None and new_limit != limit:
+        count = index["counts"].get(item_id, 0)
+        index["slots"] += _slots_for(count, new_limit) - _slots_for(count, limit)
+    index["limits"][item_id] = new_limit
+    return new_limit
+
+def _has_room_for(character, item_id, item_data=None):
+    index = _inventory_index(character)
+    limit = _item_limit(character, index, item_id, item_data)
+
+    # A new slot is only needed when every existing stack of this item is full
+    needs_slot = index["counts"].get(item_id, 0) % limit == 0
+    return index["slots"] + needs_slot <= get_inventory_capacity(character)
+
+def _append_item(character, item_id, item_data=None):
+    index = _inventory_index(character)
+    limit = _item_limit(character, index, item_id, item_data)
+
+    count = index["counts"].get(item_id, 0)
+    if count % limit == 0:
+        index["slots"] += 1
+    index["counts"][item_id] = count + 1
+
+    character["inventory"].append(item_id)
+    index["stamp"] = character["inventory"].version
+    index["version"] = next(_index_versions)
+
+def _remove_item(character, item_id):
+    index = _inventory_index(character)
+    limit = _item_limit(character, index, item_id, None)
+
+    count = index["counts"][item_id] - 1
+    if count % limit == 0:
+        index["slots"] -= 1
+    if count:
+        index["counts"][item_id] = count
+    else:
+        del index["counts"][item_id]
+
+    character["inventory"].remove(item_id)
+    index["stamp"] = character["inventory"].version
+    index["version"] = next(_index_versions)
 
 # ============================================================================
 # ITEM USAGE
 # ============================================================================
 
 def use_item(character, item_id, item_data):
-    if item_id not in character["inventory"]:
-        raise ItemNotFoundError("Item not in inventory")
+    with character_lock(character):
+        if not has_item(character, item_id):
+            raise ItemNotFoundError("Item not in inventory")
 
-    if "type" not in item_data or "effect" not in item_data:
-        raise InvalidItemTypeError("Item data is invalid")
+        if "type" not in item_data or "effect" not in item_data:
+            raise InvalidItemTypeError("Item data is invalid")
 
-    if item_data["type"] != "consumable":
-        raise InvalidItemTypeError("Item is not consumable")
+        if item_data["type"] != "consumable":
+            raise InvalidItemTypeError("Item is not consumable")
 
-    stat, value = parse_item_effect(item_data["effect"])
-    apply_stat_effect(character, stat, value)
+        effects = get_item_effects(item_data)
+        apply_effects(character, effects)
 
-    character["inventory"].remove(item_id)
-    return f"Used {item_data.get('name', item_id)} and gained {stat} +{value}"
+        _remove_item(character, item_id)
+        gained = ", ".join(f"{stat} +{value}" for _, stat, value in effects)
+        return f"Used {item_data.get('name', item_id)} and gained {gained}"
 
 def equip_weapon(character, item_id, item_data):
-    if item_id not in character["inventory"]:
-        raise ItemNotFoundError("Item not in inventory")
-    if item_data["type"] != "weapon":
-        raise InvalidItemTypeError("Item is not a weapon")
+    with character_lock(character):
+        if not has_item(character, item_id):
+            raise ItemNotFoundError("Item not in inventory")
+        if item_data["type"] != "weapon":
+            raise InvalidItemTypeError("Item is not a weapon")
 
-    if character.get("equipped_weapon"):
-        unequip_weapon(character)
+        if character.get("equipped_weapon"):
+            unequip_weapon(character)
 
-    stat, value = parse_item_effect(item_data["effect"])
-    character[stat] += value
+        effects = get_item_effects(item_data)
+        _shift_stats(character, effects, 1)
 
-    character["equipped_weapon"] = item_id
-    character["inventory"].remove(item_id)
+        character["equipped_weapon"] = item_id
+        _remove_item(character, item_id)
 
-    return f"Equipped weapon {item_data.get('name', item_id)} (+{value} {stat})"
+        return f"Equipped weapon {item_data.get('name', item_id)} ({_describe_bonuses(effects)})"
 
 def equip_armor(character, item_id, item_data):
-    if item_id not in character["inventory"]:
-        raise ItemNotFoundError("Item not in inventory")
-    if item_data["type"] != "armor":
-        raise InvalidItemTypeError("Item is not armor")
+    with character_lock(character):
+        if not has_item(character, item_id):
+            raise ItemNotFoundError("Item not in inventory")
+        if item_data["type"] != "armor":
+            raise InvalidItemTypeError("Item is not armor")
 
-    if character.get("equipped_armor"):
-        unequip_armor(character)
+        if character.get("equipped_armor"):
+            unequip_armor(character)
 
-    stat, value = parse_item_effect(item_data["effect"])
-    character[stat] += value
+        effects = get_item_effects(item_data)
+        _shift_stats(character, effects, 1)
 
-    character["equipped_armor"] = item_id
-    character["inventory"].remove(item_id)
+        character["equipped_armor"] = item_id
+        _remove_item(character, item_id)
 
-    if stat == "max_health" and character["health"] > character["max_health"]:
-        character["health"] = character["max_health"]
-
-    return f"Equipped armor {item_data.get('name', item_id)} (+{value} {stat})"
+        return f"Equipped armor {item_data.get('name', item_id)} ({_describe_bonuses(effects)})"
 
 def unequip_weapon(character):
-    weapon = character.get("equipped_weapon")
-    if weapon is None:
-        return None
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory full; cannot unequip")
+    with character_lock(character):
+        weapon = character.get("equipped_weapon")
+        if weapon is None:
+            return None
+
+        weapon_data = character["item_data"][weapon]
+        if not _has_room_for(character, weapon, weapon_data):
+            raise InventoryFullError("Inventory full; cannot unequip")
 
-    return_id = weapon
-    item_effect = character["item_data"][weapon]["effect"]
-    stat, value = parse_item_effect(item_effect)
+        return_id = weapon
+        effects = get_item_effects(weapon_data)
+        _shift_stats(character, effects, -1)
 
-    character[stat] -= value
-    character["inventory"].append(weapon)
-    character["equipped_weapon"] = None
+        _append_item(character, weapon, weapon_data)
+        character["equipped_weapon"] = None
 
-    return return_id
+        return return_id
 
 def unequip_armor(character):
-    armor = character.get("equipped_armor")
-    if armor is None:
-        return None
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory full; cannot unequip")
-
-    return_id = armor
-    item_effect = character["item_data"][armor]["effect"]
-    stat, value = parse_item_effect(item_effect)
-
-    character[stat] -= value
-    if stat == "max_health" and character["health"] > character["max_health"]:
-        character["health"] = character["max_health"]
+    with character_lock(character):
+        armor = character.get("equipped_armor")
+        if armor is None:
+            return None
+
+        armor_data = character["item_data"][armor]
+        if not _has_room_for(character, armor, armor_data):
+            raise InventoryFullError("Inventory full; cannot unequip")
+
+        return_id = armor
+        effects = get_item_effects(armor_data)
+        _shift_stats(character, effects, -1)
 
-    character["inventory"].append(armor)
-    character["equipped_armor"] = None
+        _append_item(character, armor, armor_data)
+        character["equipped_armor"] = None
 
-    return return_id
+        return return_id
 
 # ============================================================================
 # SHOP SYSTEM
@@ -149,24 +294,28 @@ def purchase_item(character, item_id, item_data):
         raise InvalidItemTypeError("Item data missing cost")
 
     cost = item_data["cost"]
-    if character["gold"] < cost:
-        raise InsufficientResourcesError("Not enough gold")
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full")
 
-    character["gold"] -= cost
-    character["inventory"].append(item_id)
-    return True
+    # Gold check, space check and the update happen under one lock
+    with character_lock(character):
+        if character["gold"] < cost:
+            raise InsufficientResourcesError("Not enough gold")
+        if not _has_room_for(character, item_id, item_data):
+            raise InventoryFullError("Inventory is full")
+
+        character["gold"] -= cost
+        _append_item(character, item_id, item_data)
+        return True
 
 def sell_item(character, item_id, item_data):
-    if item_id not in character["inventory"]:
-        raise ItemNotFoundError("Item not found")
+    with character_lock(character):
+        if not has_item(character, item_id):
+            raise ItemNotFoundError("Item not found")
 
-    sell_price = item_data["cost"] // 2
-    character["inventory"].remove(item_id)
-    character["gold"] += sell_price
+        sell_price = item_data["cost"] // 2
+        _remove_item(character, item_id)
+        character["gold"] += sell_price
 
-    return sell_price
+        return sell_price
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -181,21 +330,145 @@ def apply_stat_effect(character, stat_name, value):
     if stat_name == "health" and character["health"] > character["max_health"]:
         character["health"] = character["max_health"]
 
-def display_inventory(character, item_data_dict):
-    counts = {}
-    for item_id in character["inventory"]:
-        counts[item_id] = counts.get(item_id, 0) + 1
+# ============================================================================
+# EFFECT ENGINE
+# ============================================================================
 
-    print("\n--- Inventory ---")
-    if not counts:
-        print("Empty")
-        return
+# Effects are compiled once into tuples of (opcode, stat, value) steps so
+# using an item does not re-parse its effect string every time.
+EFFECT_ADD = 0   # character[stat] += value
+EFFECT_HEAL = 1  # health += value, capped at max_health
+
+_compiled_effects = {}
+
+def compile_item_effect(effect_string):
+    """
+    Compile an effect string like "health:20,strength:5" into opcode steps.
+    Raises ValueError if any part is not a stat:integer pair.
+    """
+    compiled = _compiled_effects.get(effect_string)
+    if compiled is not None:
+        return compiled
+
+    steps = []
+    for part in effect_string.split(","):
+        if ":" not in part:
+            raise ValueError(f"Invalid effect '{part}'")
+
+        stat, value = part.split(":", 1)
+        stat = stat.strip()
+        if not stat:
+            raise ValueError(f"Invalid effect '{part}'")
+
+        opcode = EFFECT_HEAL if stat == "health" else EFFECT_ADD
+        steps.append((opcode, stat, int(value)))
+
+    compiled = tuple(steps)
+    _compiled_effects[effect_string] = compiled
+    return compiled
+
+def get_item_effects(item_data):
+    # Catalog items come precompiled from game_data.load_items
+    effects = item_data.get("effects")
+    if effects is None:
+        effects = compile_item_effect(item_data["effect"])
+    return effects
+
+def apply_effects(character, effects):
+    for opcode, stat, value in effects:
+        if opcode == EFFECT_HEAL:
+            health = character["health"] + value
+            max_health = character["max_health"]
+            character["health"] = health if health < max_health else max_health
+        else:
+            character[stat] += value
+
+def apply_effects_batch(characters, effects):
+    """
+    Apply one item's compiled effects to many characters.
+    Returns how many characters were affected.
+    """
+    count = 0
+
+    # Single-step effects (most potions) get a tight loop with no inner dispatch
+    if len(effects) == 1:
+        opcode, stat, value = effects[0]
+        if opcode == EFFECT_HEAL:
+            for character in characters:
+                health = character["health"] + value
+                max_health = character["max_health"]
+                character["health"] = health if health < max_health else max_health
+                count += 1
+        else:
+            for character in characters:
+                character[stat] += value
+                count += 1
+        return count
+
+    for character in characters:
+        apply_effects(character, effects)
+        count += 1
+    return count
+
+def _shift_stats(character, effects, sign):
+    # Equipment adds its bonuses on equip and takes them back on unequip
+    for _, stat, value in effects:
+        character[stat] += sign * value
+        if stat == "max_health" and character["health"] > character["max_health"]:
+            character["health"] = character["max_health"]
+
+def _describe_bonuses(effects):
+    return ", ".join(f"+{value} {stat}" for _, stat, value in effects)
 
-    for item_id, qty in counts.items():
-        item = item_data_dict.get(item_id, {"name": item_id, "type": "unknown"})
-        print(f"{item['name']} ({item['type']}) x{qty}")
+# ============================================================================
+# INVENTORY DISPLAY
+# ============================================================================
+
+def render_inventory(character, item_data_dict, page=None, page_size=20):
+    """
+    Build the inventory view as one string.
+    With a page number, only that page of items is shown, plus a page footer.
+    The last view built is cached on the character until the inventory changes.
+    """
+    with character_lock(character):
+        index = _inventory_index(character)
+        key = (index["version"], page, page_size)
+
+        cached = character.get("_inventory_view")
+        if cached is not None and cached["key"] == key and cached["items"] is item_data_dict:
+            return cached["text"]
+
+        rows = list(index["counts"].items())
+        footer = None
+        if page is not None and rows:
+            pages = _slots_for(len(rows), page_size)
+            page = min(max(page, 1), pages)
+            start = (page - 1) * page_size
+            rows = rows[start:start + page_size]
+            footer = f"Page {page}/{pages}"
+
+        lines = ["\n--- Inventory ---"]
+        if not rows:
+            lines.append("Empty")
+        for item_id, qty in rows:
+            item = item_data_dict.get(item_id)
+            if item is None:
+                lines.append(f"{item_id} (unknown) x{qty}")
+            else:
+                lines.append(f"{item['name']} ({item['type']}) x{qty}")
+        if footer:
+            lines.append(footer)
+
+        text = "\n".join(lines) + "\n"
+        character["_inventory_view"] = {"key": key, "items": item_data_dict, "text": text}
+        return text
+
+def display_inventory(character, item_data_dict, page=None, page_size=20, stream=None):
+    # One write for the whole view instead of one print per item
+    if stream is None:
+        stream = sys.stdout
+    stream.write(render_inventory(character, item_data_dict, page, page_size))
 
-    
 # ============================================================================
 # TESTING
 # ============================================================================
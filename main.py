@@ -313,12 +313,14 @@ def load_game_data():
     try:
         all_quests = game_data.load_quests()
         all_items = game_data.load_items()
+        combat_system.load_enemy_templates("data/enemies.txt")
     except MissingDataFileError:
         print("Data files missing. Generating defaults...")
         game_data.create_default_data_files()
         # Retry loading
         all_quests = game_data.load_quests()
         all_items = game_data.load_items()
+        combat_system.load_enemy_templates("data/enemies.txt")
 
 def handle_character_death():
     """Handle character death"""
@@ -0,0 +1,297 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Quest Analytics Module
+
+Answers questions like "what percent of players completed orc_menace" over
+every save in the save directory without loading whole characters. Each
+save is read only up to its LEVEL, ACTIVE_QUESTS and COMPLETED_QUESTS
+lines. Saves are handed to a process pool a chunk at a time, and every
+worker sums its chunk into counters keyed by catalog quest (never by
+player), so memory depends on the catalog size, not on the number of saves.
+
+Reported per quest: completion rate, how many players have it active, and
+the median level of the players who completed it (saves hold the current
+level, not the level at completion). Funnels follow
+get_quest_prerequisite_chain, which is one shortest route to the target,
+and count how many players got at least as far as each step. A player who
+reached a later step through another prerequisite option still counts as
+having passed the earlier steps.
+
+Usage:
+    python -m quest_handler analytics --saves data/save_games \\
+        --quests data/quests.txt --funnel orc_menace --workers 4
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import game_data
+import quest_handler
+
+SAVE_SUFFIX = "_save.txt"
+QUEST_FIELDS = ("LEVEL", "ACTIVE_QUESTS", "COMPLETED_QUESTS")
+
+# Saves per task sent to a worker
+CHUNK_SIZE = 500
+
+# ============================================================================
+# READING SAVES
+# ============================================================================
+
+def read_quest_fields(path):
+    """
+    Return (level, active quest IDs, completed quest IDs) from one save,
+    reading only as far as those lines, or None if the save is unusable.
+    """
+    fields = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key in QUEST_FIELDS:
+                    fields[key] = value.strip()
+                    if len(fields) == len(QUEST_FIELDS):
+                        break
+        level = int(fields["LEVEL"])
+    except (OSError, UnicodeDecodeError, KeyError, ValueError):
+        return None
+
+    active = fields.get("ACTIVE_QUESTS", "")
+    completed = fields.get("COMPLETED_QUESTS", "")
+    return level, active.split(",") if active else [], completed.split(",") if completed else []
+
+
+def iter_save_paths(save_directory):
+    """Yield the path of every save file, one directory entry at a time."""
+    with os.scandir(save_directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(SAVE_SUFFIX) and entry.is_file():
+                yield entry.path
+
+# ============================================================================
+# COUNTING
+# ============================================================================
+# A partial result holds only sums, so partials from any split of the saves
+# merge into the same totals.
+
+def _empty_counts(funnels):
+    return {
+        "players": 0,
+        "skipped": 0,
+        "completed": {},       # quest -> players who completed it
+        "active": {},          # quest -> players with it active
+        "levels": {},          # quest -> {level: completers at that level}
+        "player_levels": {},   # level -> players
+        "funnels": {target: [0] * len(chain) for target, chain in funnels.items()},
+        "xp": 0,
+        "gold": 0,
+    }
+
+
+def count_saves(task):
+    """Count one chunk of saves. Returns a partial result for merge_counts."""
+    paths, rewards, funnels = task
+    counts = _empty_counts(funnels)
+
+    for path in paths:
+        fields = read_quest_fields(path)
+        if fields is None:
+            counts["skipped"] += 1
+            continue
+
+        level, active, completed = fields
+        counts["players"] += 1
+        counts["player_levels"][level] = counts["player_levels"].get(level, 0) + 1
+
+        for qid in set(active):
+            if qid in rewards:
+                counts["active"][qid] = counts["active"].get(qid, 0) + 1
+
+        # Only catalog quests are counted, which keeps the counters bounded
+        done = set(completed)
+        for qid in done:
+            reward = rewards.get(qid)
+            if reward is None:
+                continue
+            counts["completed"][qid] = counts["completed"].get(qid, 0) + 1
+            by_level = counts["levels"].setdefault(qid, {})
+            by_level[level] = by_level.get(level, 0) + 1
+            counts["xp"] += reward[0]
+            counts["gold"] += reward[1]
+
+        # Each funnel step counts players who finished it or any later step,
+        # so a different prerequisite route is not counted as a drop-off
+        for target, chain in funnels.items():
+            reached = 0
+            for i, qid in enumerate(chain):
+                if qid in done:
+                    reached = i + 1
+            steps = counts["funnels"][target]
+            for i in range(reached):
+                steps[i] += 1
+
+    return counts
+
+
+def merge_counts(total, part):
+    for key in ("players", "skipped", "xp", "gold"):
+        total[key] += part[key]
+    for key in ("completed", "active", "player_levels"):
+        for item, count in part[key].items():
+            total[key][item] = total[key].get(item, 0) + count
+    for qid, by_level in part["levels"].items():
+        merged = total["levels"].setdefault(qid, {})
+        for level, count in by_level.items():
+            merged[level] = merged.get(level, 0) + count
+    for target, steps in part["funnels"].items():
+        total["funnels"][target] = [a + b for a, b in zip(total["funnels"][target], steps)]
+    return total
+
+
+def _chunks(paths, size):
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_saves(save_directory, quest_data_dict, funnel_quests=(), workers=None,
+                  chunk_size=CHUNK_SIZE):
+    """
+    Stream every save in save_directory and return the summary built by
+    summarize(). Only a few chunks are in flight at a time, so memory stays
+    flat however many saves there are.
+    """
+    rewards = {qid: (quest.get("reward_xp", 0), quest.get("reward_gold", 0))
+               for qid, quest in quest_data_dict.items()}
+    funnels = {qid: quest_handler.get_quest_prerequisite_chain(qid, quest_data_dict) for qid in funnel_quests}
+    tasks = ((chunk, rewards, funnels) for chunk in _chunks(iter_save_paths(save_directory), chunk_size))
+    total = _empty_counts(funnels)
+
+    if workers == 1:
+        for task in tasks:
+            merge_counts(total, count_saves(task))
+        return summarize(total, quest_data_dict, funnels)
+
+    limit = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for task in tasks:
+            pending.add(pool.submit(count_saves, task))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge_counts(total, future.result())
+        for future in pending:
+            merge_counts(total, future.result())
+
+    return summarize(total, quest_data_dict, funnels)
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+
+def median_level(by_level):
+    """Median of a {level: count} histogram (the lower middle for even counts)."""
+    remaining = (sum(by_level.values()) + 1) // 2
+    for level in sorted(by_level):
+        remaining -= by_level[level]
+        if remaining <= 0:
+            return level
+    return None
+
+
+def summarize(counts, quest_data_dict, funnels):
+    players = counts["players"]
+    quests = []
+    for qid in quest_data_dict:
+        completed = counts["completed"].get(qid, 0)
+        quests.append({
+            "quest_id": qid,
+            "completed": completed,
+            "completion_rate": completed / players if players else 0.0,
+            "active": counts["active"].get(qid, 0),
+            "median_level": median_level(counts["levels"].get(qid, {})),
+        })
+
+    funnel_rows = {}
+    for target, chain in funnels.items():
+        steps = counts["funnels"][target]
+        rows = []
+        for i, (qid, reached) in enumerate(zip(chain, steps)):
+            previous = steps[i - 1] if i else players
+            rows.append({
+                "quest_id": qid,
+                "players": reached,
+                "drop_off": 1 - reached / previous if previous else 0.0,
+            })
+        funnel_rows[target] = rows
+
+    return {
+        "players": players,
+        "skipped": counts["skipped"],
+        "median_player_level": median_level(counts["player_levels"]),
+        "quests": quests,
+        "funnels": funnel_rows,
+        "rewards": {
+            "xp": counts["xp"],
+            "gold": counts["gold"],
+            "mean_xp": counts["xp"] / players if players else 0.0,
+            "mean_gold": counts["gold"] / players if players else 0.0,
+        },
+    }
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def print_report(report):
+    print(f"{report['players']} players ({report['skipped']} unreadable saves skipped), "
+          f"median level {report['median_player_level']}")
+    print(f"\n{'quest':<24}{'done':>8}{'rate':>8}{'active':>8}{'med lvl':>9}")
+    for row in report["quests"]:
+        median = row["median_level"] if row["median_level"] is not None else "-"
+        print(f"{row['quest_id']:<24}{row['completed']:>8}{row['completion_rate'] * 100:>7.1f}%"
+              f"{row['active']:>8}{median:>9}")
+
+    for target, rows in report["funnels"].items():
+        print(f"\nFunnel to {target}:")
+        for row in rows:
+            print(f"  {row['quest_id']:<22}{row['players']:>8}{row['drop_off'] * 100:>8.1f}% dropped")
+
+    rewards = report["rewards"]
+    print(f"\nRewards earned: {rewards['xp']} XP, {rewards['gold']} gold "
+          f"({rewards['mean_xp']:.1f} XP and {rewards['mean_gold']:.1f} gold per player)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quest_handler analytics",
+                                     description="Quest completion stats across all saved characters.")
+    parser.add_argument("--saves", default="data/save_games", help="save directory")
+    parser.add_argument("--quests", default="data/quests.txt", help="quest data file")
+    parser.add_argument("--funnel", nargs="+", default=[], help="quests to show prerequisite funnels for")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="saves per worker task")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    quests = game_data.load_quests(args.quests)
+    for qid in args.funnel:
+        if qid not in quests:
+            parser.error(f"unknown quest '{qid}' for --funnel")
+
+    report = analyze_saves(args.saves, quests, args.funnel,
+                           workers=args.workers, chunk_size=args.chunk_size)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
@@ -0,0 +1,214 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Quest Eligibility Module
+
+Answers "which characters can accept which quests" for a whole population
+at once, for live-ops targeting such as announcing a new quest. Characters
+are packed once into numpy arrays (levels, plus completed and active quests
+as bitsets numbered like the quest index), each quest's required level and
+prerequisite options are compiled into vectors, and the checks run as a
+few array operations per block of characters. Every answer matches
+can_accept_quest for the same character and quest.
+
+Usage:
+    population = build_population(characters, quests)
+    matrix = eligibility_matrix(population)                # characters x quests
+    rows = eligible_characters(population, "new_quest")    # one quest, sparse
+"""
+
+import quest_handler
+from custom_exceptions import QuestNotFoundError
+
+try:
+    import numpy as np
+except ImportError:  # numpy is required for everything in this module
+    np = None
+
+# Most temporary array cells one block may use; this sets how many
+# characters are checked together
+BLOCK_CELLS = 1 << 22
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Quest eligibility needs numpy (pip install numpy).")
+
+# ============================================================================
+# POPULATION
+# ============================================================================
+
+def build_population(characters, quest_data_dict):
+    """
+    Pack a list of characters into arrays: levels, and completed and active
+    quests as bitsets of 64-bit words, one column per character. Build it
+    once and query it many times.
+    """
+    _require_numpy()
+    index = quest_handler.get_quest_index(quest_data_dict)
+    words = max(1, (len(index["bits"]) + 63) // 64)
+
+    return {
+        "catalog": quest_data_dict,
+        "index": index,
+        "size": len(characters),
+        "level": np.fromiter((c["level"] for c in characters), dtype=np.int64, count=len(characters)),
+        "completed": _pack_bitsets(characters, "completed_quests", index["bits"], words),
+        "active": _pack_bitsets(characters, "active_quests", index["bits"], words),
+    }
+
+
+def _pack_bitsets(characters, field, bits, words):
+    # Gather (character, bit) pairs, then set them all in one numpy call.
+    # Words are rows, so gathering a word for every character reads one
+    # contiguous row.
+    columns = []
+    numbers = []
+    for column, character in enumerate(characters):
+        for qid in character[field]:
+            bit = bits.get(qid)
+            if bit is not None:
+                columns.append(column)
+                numbers.append(bit)
+
+    packed = np.zeros((words, len(characters)), dtype=np.uint64)
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    np.bitwise_or.at(packed, ((numbers >> np.uint64(6)).astype(np.intp), np.asarray(columns, dtype=np.intp)),
+                     np.uint64(1) << (numbers & np.uint64(63)))
+    return packed
+
+# ============================================================================
+# QUEST VECTORS
+# ============================================================================
+# Each prerequisite option becomes one or more "terms": a word number and
+# the bits that option needs in that word. An option is met when all its
+# terms are, and a quest when any of its options is. Rather than reduce
+# over ragged groups, the checks run in passes: pass r covers the r-th term
+# of every option (and the r-th option of every quest), so the number of
+# passes is the size of the largest option, not the number of quests.
+
+def _compile_quests(population, quest_ids):
+    catalog = population["catalog"]
+    index = population["index"]
+    bits = index["bits"]
+
+    quest_ids = list(catalog) if quest_ids is None else list(quest_ids)
+    for qid in quest_ids:
+        if qid not in catalog:
+            raise QuestNotFoundError(f"Quest '{qid}' not found")
+
+    option_terms = []    # per option: [(word, mask), ...]
+    quest_options = []   # per gated quest: [option number, ...]
+    gated = []           # rows of quests with prerequisites
+
+    for row, qid in enumerate(quest_ids):
+        options = index["requirements"][qid]
+        if not options:
+            continue
+
+        gated.append(row)
+        quest_options.append(list(range(len(option_terms), len(option_terms) + len(options))))
+        for group in options:
+            masks = {}
+            for prereq in group:
+                bit = bits[prereq]
+                masks[bit >> 6] = masks.get(bit >> 6, 0) | (1 << (bit & 63))
+            option_terms.append(list(masks.items()))
+
+    term_passes = []
+    for rank in range(max(map(len, option_terms), default=0)):
+        members = [(option, terms[rank]) for option, terms in enumerate(option_terms) if len(terms) > rank]
+        term_passes.append((
+            np.array([option for option, _ in members], dtype=np.intp),
+            np.array([word for _, (word, _) in members], dtype=np.intp),
+            np.array([mask for _, (_, mask) in members], dtype=np.uint64)[:, None],
+        ))
+
+    option_passes = []
+    for rank in range(max(map(len, quest_options), default=0)):
+        members = [(quest, options[rank]) for quest, options in enumerate(quest_options) if len(options) > rank]
+        option_passes.append((
+            np.array([quest for quest, _ in members], dtype=np.intp),
+            np.array([option for _, option in members], dtype=np.intp),
+        ))
+
+    own = np.array([bits[qid] for qid in quest_ids], dtype=np.int64)
+    return {
+        "quest_ids": quest_ids,
+        "level": np.array([catalog[qid].get("required_level", 1) for qid in quest_ids], dtype=np.int64)[:, None],
+        "word": own >> 6,
+        "bit": (np.uint64(1) << (own & 63).astype(np.uint64))[:, None],
+        "options": len(option_terms),
+        "term_passes": term_passes,
+        "option_passes": option_passes,
+        "gated": np.array(gated, dtype=np.intp),
+    }
+
+# ============================================================================
+# ELIGIBILITY
+# ============================================================================
+
+def _blocks(population, quests):
+    cells = max(1, len(quests["quest_ids"]), quests["options"])
+    step = max(1, BLOCK_CELLS // cells)
+    for start in range(0, population["size"], step):
+        yield start, min(start + step, population["size"])
+
+
+def _eligible_block(population, quests, start, stop):
+    # Rows are quests and columns are characters start..stop
+    completed = population["completed"]
+    active = population["active"]
+    span = slice(start, stop)
+
+    # Level high enough, and the quest neither completed nor active
+    eligible = population["level"][span] >= quests["level"]
+    taken = (completed[quests["word"], span] | active[quests["word"], span]) & quests["bit"]
+    eligible &= taken == 0
+
+    # Options need all their terms; quests need any one option
+    if quests["options"]:
+        options_met = np.ones((quests["options"], stop - start), dtype=bool)
+        for options, words, masks in quests["term_passes"]:
+            options_met[options] &= (completed[words, span] & masks) == masks
+
+        gated_met = np.zeros((len(quests["gated"]), stop - start), dtype=bool)
+        for gated, options in quests["option_passes"]:
+            gated_met[gated] |= options_met[options]
+        eligible[quests["gated"]] &= gated_met
+
+    return eligible
+
+
+def eligibility_matrix(population, quest_ids=None):
+    """
+    Boolean array with one row per character and one column per quest
+    (quest_ids, or the whole catalog in catalog order).
+    """
+    _require_numpy()
+    quests = _compile_quests(population, quest_ids)
+    matrix = np.empty((population["size"], len(quests["quest_ids"])), dtype=bool)
+    for start, stop in _blocks(population, quests):
+        matrix[start:stop] = _eligible_block(population, quests, start, stop).T
+    return matrix
+
+
+def eligible_pairs(population, quest_ids=None):
+    """
+    Sparse form of eligibility_matrix: (character rows, quest columns) of
+    every eligible pair, in row order, without holding the whole matrix.
+    """
+    _require_numpy()
+    quests = _compile_quests(population, quest_ids)
+    rows = [np.empty(0, dtype=np.intp)]
+    columns = [np.empty(0, dtype=np.intp)]
+    for start, stop in _blocks(population, quests):
+        block_rows, block_columns = np.nonzero(_eligible_block(population, quests, start, stop).T)
+        rows.append(block_rows + start)
+        columns.append(block_columns)
+    return np.concatenate(rows), np.concatenate(columns)
+
+
+def eligible_characters(population, quest_id):
+    """Row numbers of every character that could accept one quest right now."""
+    rows, _ = eligible_pairs(population, [quest_id])
+    return rows
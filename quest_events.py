@@ -0,0 +1,90 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Quest Events Module
+
+A small publish/subscribe bus for quest progress. quest_handler and
+character_manager publish to a bus passed in as event_bus=..., and
+subscribers receive plain event dicts with a "type" key, like battle events:
+
+    quest_accepted   character, quest_id
+    quest_completed  character, quest_id, xp, gold
+    quest_unlocked   character, quest_id, available (False while the
+                     character's level is still too low), unlocked_by (the
+                     quest just completed, or None when a level-up did it)
+    quest_abandoned  character, quest_id
+    level_up         character, level, previous_level
+
+"character" is the character's name. Unlock events come from the quest
+index's reverse prerequisite lists, so completing a quest only looks at the
+quests that name it as a prerequisite.
+
+With batch=True, events are queued instead of delivered at once, and each
+subscriber gets one list of its events per flush(). A busy server can flush
+once per tick instead of calling every subscriber for every event.
+"""
+
+QUEST_ACCEPTED = "quest_accepted"
+QUEST_COMPLETED = "quest_completed"
+QUEST_UNLOCKED = "quest_unlocked"
+QUEST_ABANDONED = "quest_abandoned"
+LEVEL_UP = "level_up"
+
+EVENT_TYPES = (QUEST_ACCEPTED, QUEST_COMPLETED, QUEST_UNLOCKED, QUEST_ABANDONED, LEVEL_UP)
+
+
+class QuestEventBus:
+    """Routes published quest events to the handlers subscribed to their type."""
+    def __init__(self, batch=False, max_pending=1024):
+        self.batch = batch
+        self.max_pending = max_pending
+        self.pending = []
+        self._handlers = {}  # event type, or None for every type -> [handler, ...]
+        self._routes = {}    # event type -> handlers to call, rebuilt on (un)subscribe
+
+    def subscribe(self, handler, *event_types):
+        """Call handler for the given event types, or for every event if none are given."""
+        for event_type in event_types or (None,):
+            if event_type is not None and event_type not in EVENT_TYPES:
+                raise ValueError(f"Unknown quest event '{event_type}'. Choose from: {', '.join(EVENT_TYPES)}")
+            self._handlers.setdefault(event_type, []).append(handler)
+        self._routes.clear()
+        return handler
+
+    def unsubscribe(self, handler):
+        for handlers in self._handlers.values():
+            while handler in handlers:
+                handlers.remove(handler)
+        self._routes.clear()
+
+    def _route(self, event_type):
+        route = self._routes.get(event_type)
+        if route is None:
+            # A handler subscribed to a type and to everything is called once
+            handlers = self._handlers.get(event_type, []) + self._handlers.get(None, [])
+            route = self._routes[event_type] = tuple(dict.fromkeys(handlers))
+        return route
+
+    def publish(self, event_type, **data):
+        event = {"type": event_type, **data}
+
+        if self.batch:
+            self.pending.append(event)
+            if len(self.pending) >= self.max_pending:
+                self.flush()
+        else:
+            for handler in self._route(event_type):
+                handler(event)
+        return event
+
+    def flush(self):
+        """Deliver queued events, one list per subscriber in publish order. Returns the event count."""
+        events, self.pending = self.pending, []
+
+        batches = {}
+        for event in events:
+            for handler in self._route(event["type"]):
+                batches.setdefault(handler, []).append(event)
+
+        for handler, handler_events in batches.items():
+            handler(handler_events)
+        return len(events)
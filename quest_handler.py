@@ -14,22 +14,102 @@ from custom_exceptions import (
     QuestRequirementsNotMetError,
     QuestAlreadyCompletedError,
     QuestNotActiveError,
-    InsufficientLevelError
+    InsufficientLevelError,
+    CircularPrerequisiteError
 )
 
-from custom_exceptions import (
-    QuestNotFoundError,
-    QuestRequirementsNotMetError,
-    QuestAlreadyCompletedError,
-    QuestNotActiveError,
-    InsufficientLevelError
-)
+import bisect
+import hashlib
+import itertools
+from collections import OrderedDict
+
+from quest_events import QUEST_ACCEPTED, QUEST_COMPLETED, QUEST_UNLOCKED, QUEST_ABANDONED
+
+# ============================================================================
+# QUEST STATE
+# ============================================================================
+
+class OrderedQuestSet(list):
+    """
+    List of quest IDs with set-speed `in` checks, used for a character's
+    active and completed quests. It is still a list, so it keeps insertion
+    order for display and saves with ",".join() like before. Adding an ID
+    it already holds does nothing, and `version` counts every change.
+    """
+    def __init__(self, quest_ids=()):
+        super().__init__()
+        self._members = set()
+        self.version = 0
+        self.extend(quest_ids)
+
+    def __contains__(self, quest_id):
+        return quest_id in self._members
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def append(self, quest_id):
+        if quest_id not in self._members:
+            self._members.add(quest_id)
+            super().append(quest_id)
+            self.version += 1
+
+    def extend(self, quest_ids):
+        for quest_id in quest_ids:
+            self.append(quest_id)
+
+    def __iadd__(self, quest_ids):
+        self.extend(quest_ids)
+        return self
+
+    def insert(self, index, quest_id):
+        if quest_id not in self._members:
+            self._members.add(quest_id)
+            super().insert(index, quest_id)
+            self.version += 1
+
+    def remove(self, quest_id):
+        if quest_id not in self._members:
+            raise ValueError(f"{quest_id!r} is not in the quest list")
+        super().remove(quest_id)
+        self._members.discard(quest_id)
+        self.version += 1
+
+    def pop(self, index=-1):
+        quest_id = super().pop(index)
+        self._members.discard(quest_id)
+        self.version += 1
+        return quest_id
+
+    def clear(self):
+        super().clear()
+        self._members.clear()
+        self.version += 1
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._resync()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._resync()
+
+    def _resync(self):
+        # Slice edits can bring in duplicates; keep the first of each
+        quest_ids = list(self)
+        super().clear()
+        self._members = set()
+        for quest_id in quest_ids:
+            if quest_id not in self._members:
+                self._members.add(quest_id)
+                super().append(quest_id)
+        self.version += 1
 
 # ============================================================================
 # QUEST MANAGEMENT
 # ============================================================================
 
-def accept_quest(character, quest_id, quest_data_dict):
+def accept_quest(character, quest_id, quest_data_dict, event_bus=None):
     """
     Accept a new quest.
     """
@@ -39,30 +119,37 @@ def accept_quest(character, quest_id, quest_data_dict):
 
     quest = quest_data_dict[quest_id]
     required_level = quest.get("required_level", 1)
-    prereq = quest.get("prerequisite", "NONE")
 
     # Check level requirement
     if character["level"] < required_level:
         raise InsufficientLevelError("Character level too low")
 
-    # Check prerequisite
-    if prereq != "NONE" and prereq not in character["completed_quests"]:
+    frontier = _quest_frontier(character, quest_data_dict, event_bus)
+
+    # Check prerequisites against the completed-quest bitset
+    if not _prerequisites_met(get_quest_index(quest_data_dict), quest_id, frontier["bits"]):
         raise QuestRequirementsNotMetError("Prerequisite quest not completed")
 
     # Check not already completed
-    if quest_id in character["completed_quests"]:
+    if quest_id in frontier["completed"]:
         raise QuestAlreadyCompletedError("Quest already completed")
 
     # Check not already active
-    if quest_id in character["active_quests"]:
+    if quest_id in frontier["active"]:
         raise QuestAlreadyCompletedError("Quest already completed or already active")
 
     # Accept quest
     character["active_quests"].append(quest_id)
+    frontier["available"].discard(quest_id)
+    frontier["active"].add(quest_id)
+    _frontier_synced(frontier, character)
+
+    if event_bus is not None:
+        event_bus.publish(QUEST_ACCEPTED, character=character.get("name"), quest_id=quest_id)
     return True
 
 
-def complete_quest(character, quest_id, quest_data_dict):
+def complete_quest(character, quest_id, quest_data_dict, event_bus=None):
     """
     Complete an active quest and grant rewards.
     """
@@ -70,15 +157,22 @@ def complete_quest(character, quest_id, quest_data_dict):
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError("Quest not found")
 
+    frontier = _quest_frontier(character, quest_data_dict, event_bus)
+
     # Check quest is active
-    if quest_id not in character["active_quests"]:
+    if quest_id not in frontier["active"]:
         raise QuestNotActiveError("Quest is not active")
 
     quest = quest_data_dict[quest_id]
+    totals_current = _totals_are_current(character, quest_data_dict)
+    first_completion = quest_id not in frontier["completed"]
 
     # Remove from active, add to completed
     character["active_quests"].remove(quest_id)
     character["completed_quests"].append(quest_id)
+    unlocked = _frontier_completed(frontier, character, quest_id)
+    if totals_current:
+        _totals_completed(character, quest, first_completion)
 
     reward_xp = quest.get("reward_xp", 0)
     reward_gold = quest.get("reward_gold", 0)
@@ -87,23 +181,51 @@ def complete_quest(character, quest_id, quest_data_dict):
     character["experience"] = character.get("experience", 0) + reward_xp
     character["gold"] = character.get("gold", 0) + reward_gold
 
+    if event_bus is not None:
+        name = character.get("name")
+        event_bus.publish(QUEST_COMPLETED, character=name, quest_id=quest_id, xp=reward_xp, gold=reward_gold)
+        for qid in unlocked:
+            event_bus.publish(QUEST_UNLOCKED, character=name, quest_id=qid,
+                              available=qid in frontier["available"], unlocked_by=quest_id)
+
     return {
         "xp": reward_xp,
         "gold": reward_gold
     }
 
 
-def abandon_quest(character, quest_id):
+def abandon_quest(character, quest_id, event_bus=None):
     """
     Abandon an active quest.
     """
     if quest_id not in character["active_quests"]:
         raise QuestNotActiveError("Quest is not active")
 
+    frontier = character.get("_quest_frontier")
     character["active_quests"].remove(quest_id)
+    if frontier is not None:
+        _frontier_abandoned(frontier, character, quest_id)
+
+    if event_bus is not None:
+        event_bus.publish(QUEST_ABANDONED, character=character.get("name"), quest_id=quest_id)
     return True
 
 
+def check_level_unlocks(character, quest_data_dict, event_bus=None):
+    """
+    Bring the character's quest frontier up to their level after a level-up
+    and return the quests that became available, publishing quest_unlocked
+    for each. Quests a level-up makes available stay pending until they are
+    reported here or by a quest call given the bus, so refreshing the quest
+    board in between does not lose them.
+    """
+    frontier = _current_frontier(character, quest_data_dict)
+    unlocked = _take_level_unlocks(frontier)
+    if event_bus is not None:
+        _publish_level_unlocks(event_bus, character, unlocked)
+    return [quest_data_dict[qid] for qid in unlocked]
+
+
 def get_active_quests(character, quest_data_dict):
     return [quest_data_dict[q] for q in character["active_quests"] if q in quest_data_dict]
 
@@ -113,28 +235,10 @@ def get_completed_quests(character, quest_data_dict):
 
 
 def get_available_quests(character, quest_data_dict):
-    available = []
-    for qid, quest in quest_data_dict.items():
-        # Skip completed
-        if qid in character["completed_quests"]:
-            continue
-
-        # Skip active
-        if qid in character["active_quests"]:
-            continue
-
-        # Level requirement
-        if character["level"] < quest.get("required_level", 1):
-            continue
-
-        # Prerequisite
-        prereq = quest.get("prerequisite", "NONE")
-        if prereq != "NONE" and prereq not in character["completed_quests"]:
-            continue
-
-        available.append(quest)
-
-    return available
+    # The frontier already holds exactly the acceptable quests; only order them
+    frontier = _quest_frontier(character, quest_data_dict)
+    position = get_quest_index(quest_data_dict)["position"]
+    return [quest_data_dict[qid] for qid in sorted(frontier["available"], key=position.__getitem__)]
 
 # ============================================================================
 # QUEST TRACKING
@@ -152,44 +256,53 @@ def can_accept_quest(character, quest_id, quest_data_dict):
     if quest_id not in quest_data_dict:
         return False
 
-    quest = quest_data_dict[quest_id]
+    return quest_id in _quest_frontier(character, quest_data_dict)["available"]
 
-    if character["level"] < quest.get("required_level", 1):
-        return False
 
-    prereq = quest.get("prerequisite", "NONE")
-    if prereq != "NONE" and prereq not in character["completed_quests"]:
-        return False
+def get_quest_prerequisite_chain(quest_id, quest_data_dict):
+    if quest_id not in quest_data_dict:
+        raise QuestNotFoundError("Quest not found")
 
-    if quest_id in character["completed_quests"]:
-        return False
+    index = _index_holding(quest_data_dict, quest_id)
+    chain = index["chains"].get(quest_id)
 
-    if quest_id in character["active_quests"]:
-        return False
+    if chain is None:
+        _raise_if_blocked(index, quest_id)
 
-    return True
+        # Prerequisites before the quests that need them, following the
+        # shortest option wherever a quest has a choice
+        route = index["route"]
+        chain = []
+        seen = set()
+        stack = [(quest_id, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if expanded:
+                chain.append(current)
+            elif current not in seen:
+                seen.add(current)
+                stack.append((current, True))
+                stack.extend((prereq, False) for prereq in reversed(route[current]))
 
+        chain = tuple(chain)
+        index["chains"][quest_id] = chain
 
-def get_quest_prerequisite_chain(quest_id, quest_data_dict):
-    if quest_id not in quest_data_dict:
-        raise QuestNotFoundError("Quest not found")
+    return list(chain)
 
-    chain = []
-    current = quest_id
 
-    while True:
-        if current not in quest_data_dict:
-            raise QuestNotFoundError("Prerequisite quest does not exist")
-
-        chain.insert(0, current)
-        prereq = quest_data_dict[current].get("prerequisite", "NONE")
+def get_quest_depth(quest_id, quest_data_dict):
+    """Prerequisite steps before a quest along its shortest route (0 for none)."""
+    if quest_id not in quest_data_dict:
+        raise QuestNotFoundError("Quest not found")
 
-        if prereq == "NONE":
-            break
+    index = _index_holding(quest_data_dict, quest_id)
+    _raise_if_blocked(index, quest_id)
+    return index["depth"][quest_id]
 
-        current = prereq
 
-    return chain
+def get_quest_topological_order(quest_data_dict):
+    """Quest IDs with every prerequisite before the quests that need it."""
+    return list(get_quest_index(quest_data_dict)["order"])
 
 # ============================================================================
 # QUEST STATISTICS
@@ -200,28 +313,92 @@ def get_quest_completion_percentage(character, quest_data_dict):
     if total == 0:
         return 0.0
 
-    completed = len(character["completed_quests"])
+    # Only quests still in the catalog count toward the percentage
+    completed = _quest_totals(character, quest_data_dict)["completed"]
     return (completed / total) * 100
 
 
 def get_total_quest_rewards_earned(character, quest_data_dict):
-    total_xp = 0
-    total_gold = 0
+    totals = _quest_totals(character, quest_data_dict)
+    return {"total_xp": totals["xp"], "total_gold": totals["gold"]}
 
-    for qid in character["completed_quests"]:
-        if qid in quest_data_dict:
-            quest = quest_data_dict[qid]
-            total_xp += quest.get("reward_xp", 0)
-            total_gold += quest.get("reward_gold", 0)
+# ============================================================================
+# RUNNING TOTALS
+# ============================================================================
+# character["quest_totals"] holds how many catalog quests the character has
+# completed and the XP and gold they paid. complete_quest adds to it in O(1)
+# and it is saved with the character. It records the catalog's fingerprint,
+# so totals made against a different catalog, or a completed list edited
+# outside this module, are rebuilt once on next use. A plain list cannot
+# show edits that keep its length, so with one the totals are rebuilt on
+# every use.
+
+def set_quest_totals(character, totals):
+    """Install totals read from a save, matched to the current completed list."""
+    character["quest_totals"] = totals
+    _totals_synced(character)
 
-    return {"total_xp": total_xp, "total_gold": total_gold}
+
+def _totals_synced(character):
+    completed = character["completed_quests"]
+    character["_quest_totals_synced"] = (completed, _list_stamp(completed))
+
+
+def _totals_are_current(character, quest_data_dict):
+    totals = character.get("quest_totals")
+    synced = character.get("_quest_totals_synced")
+    if totals is None or synced is None:
+        return False
+    if totals["catalog"] != get_quest_index(quest_data_dict)["fingerprint"]:
+        return False
+    return (synced[0] is character["completed_quests"] and synced[1] is not None
+            and synced[1] == _list_stamp(synced[0]))
+
+
+def _quest_totals(character, quest_data_dict):
+    if _totals_are_current(character, quest_data_dict):
+        return character["quest_totals"]
+
+    totals = {"catalog": get_quest_index(quest_data_dict)["fingerprint"], "completed": 0, "xp": 0, "gold": 0}
+    for qid in set(character["completed_quests"]):
+        quest = quest_data_dict.get(qid)
+        if quest is not None:
+            totals["completed"] += 1
+            totals["xp"] += quest.get("reward_xp", 0)
+            totals["gold"] += quest.get("reward_gold", 0)
+
+    set_quest_totals(character, totals)
+    return totals
+
+
+def _totals_completed(character, quest, first_completion):
+    totals = character["quest_totals"]
+    if first_completion:
+        totals["completed"] += 1
+        totals["xp"] += quest.get("reward_xp", 0)
+        totals["gold"] += quest.get("reward_gold", 0)
+    _totals_synced(character)
 
 
 def get_quests_by_level(quest_data_dict, min_level, max_level):
-    return [
-        q for q in quest_data_dict.values()
-        if min_level <= q.get("required_level", 1) <= max_level
-    ]
+    """Quests whose required level is in [min_level, max_level], lowest level first."""
+    index = get_quest_index(quest_data_dict)
+    levels = index["sorted_levels"]
+    start = bisect.bisect_left(levels, min_level)
+    stop = bisect.bisect_right(levels, max_level)
+
+    # A quest removed or moved to another level since the index was built
+    # means the catalog was edited in place; rebuild once and answer again
+    for qid, level in zip(index["by_level"][start:stop], levels[start:stop]):
+        if qid not in quest_data_dict or quest_data_dict[qid].get("required_level", 1) != level:
+            invalidate_quest_index(quest_data_dict)
+            return get_quests_by_level(quest_data_dict, min_level, max_level)
+    return [quest_data_dict[qid] for qid in index["by_level"][start:stop]]
+
+
+def get_quests_near_level(quest_data_dict, level, spread=2):
+    """Quests within `spread` levels of the given level, for "near my level" lists."""
+    return get_quests_by_level(quest_data_dict, level - spread, level + spread)
 
 # ============================================================================
 # DISPLAY FUNCTIONS
@@ -256,16 +433,549 @@ def display_character_quest_progress(character, quest_data_dict):
 # VALIDATION
 # ============================================================================
 
-def validate_quest_prerequisites(quest_data_dict):
-    for qid, quest in quest_data_dict.items():
-        prereq = quest.get("prerequisite", "NONE")
-        if prereq != "NONE" and prereq not in quest_data_dict:
-            raise QuestNotFoundError(
-                f"Prerequisite '{prereq}' for quest '{qid}' does not exist"
-            )
+def analyze_quest_catalog(quest_data_dict, max_level=None):
+    """
+    Whole-catalog prerequisite report in one linear pass:
+      missing      (quest, prerequisite) pairs naming quests that do not exist
+      cycles       each prerequisite cycle, as a list of quest IDs
+      unreachable  quest -> reason for every quest no character can unlock:
+                   after a missing quest or a cycle, or (with max_level) one
+                   whose chain needs a higher level than the cap
+      max_depth    most prerequisite steps any quest needs, taking the shortest
+                   option wherever there is a choice (-1 if empty)
+      deepest      the quest at the end of that chain
+    """
+    index = get_quest_index(quest_data_dict)
+
+    missing = [(qid, prereq) for qid, prereqs in index["prerequisites"].items()
+               for prereq in prereqs if prereq not in quest_data_dict]
+
+    unreachable = {}
+    for qid, (kind, detail) in index["blocked"].items():
+        if kind == "missing":
+            unreachable[qid] = f"needs missing quest '{detail}'"
+        else:
+            unreachable[qid] = "in or after a prerequisite cycle"
+
+    if max_level is not None:
+        for qid, level in index["earliest"].items():
+            if level > max_level:
+                unreachable[qid] = f"needs level {level}, above the level cap of {max_level}"
+
+    depth = index["depth"]
+    deepest = max(depth, key=depth.__getitem__, default=None)
+    return {
+        "quests": len(quest_data_dict),
+        "missing": missing,
+        "cycles": index["cycles"],
+        "unreachable": unreachable,
+        "max_depth": depth[deepest] if deepest is not None else -1,
+        "deepest": deepest,
+    }
+
+
+def validate_quest_prerequisites(quest_data_dict, max_level=None):
+    """
+    Raise on the first problem analyze_quest_catalog finds: a missing
+    prerequisite, a cycle, or a quest locked above max_level.
+    """
+    report = analyze_quest_catalog(quest_data_dict, max_level)
+
+    if report["missing"]:
+        qid, prereq = report["missing"][0]
+        raise QuestNotFoundError(
+            f"Prerequisite '{prereq}' for quest '{qid}' does not exist"
+        )
+
+    if report["cycles"]:
+        raise CircularPrerequisiteError(_describe_cycle(report["cycles"][0]))
+
+    if report["unreachable"]:
+        qid, reason = next(iter(report["unreachable"].items()))
+        raise QuestRequirementsNotMetError(f"Quest '{qid}' can never be unlocked: {reason}")
 
     return True
 
+# ============================================================================
+# QUEST GRAPH INDEX
+# ============================================================================
+# Built once per quest catalog: which quests each quest unlocks (the reverse
+# of the prerequisite links), quests grouped by required level, each quest's
+# position so results keep catalog order, all quests sorted by required
+# level (for bisecting level ranges), each quest's depth in its
+# prerequisite chain, the lowest level it can be unlocked at, and a
+# topological order. Quests whose chain runs into a missing quest or a
+# cycle get no depth; they are listed in "blocked" with the reason, so
+# chain queries fail fast instead of walking forever.
+# Prerequisite chains are memoized in the index as they are asked for.
+#
+# A PREREQUISITE field may list several quests: "a,b" needs both, "a|b"
+# needs either, and "a,b|c" needs a and b, or c. Every quest ID gets a
+# dense bit number when the index is built, each quest's options compile
+# to one bitmask apiece, and a character's completed quests are kept as a
+# single integer with those bits set, so a requirement check is a couple of
+# bitwise operations however many quests it names.
+#
+# Each character also keeps a frontier in character["_quest_frontier"]: the
+# quests it could accept right now, plus quests whose prerequisite is done
+# but whose level is still too high. Accepting, completing and abandoning
+# quests update it in place (completing only checks the quests that list
+# the finished one as a prerequisite) and a level-up moves just the quests of the levels
+# gained. The quest lists are still lists for saving; if other code
+# replaces or edits them, the frontier is rebuilt once. That relies on the
+# OrderedQuestSet version count, so a character holding plain lists gets a
+# fresh frontier on every call.
+
+MAX_CACHED_CATALOGS = 8
+
+_catalog_indexes = OrderedDict()  # id(catalog) -> (catalog, index)
+_index_versions = itertools.count(1)
+
+
+def parse_prerequisites(text):
+    """
+    Split a PREREQUISITE value into its options: "a,b|c" gives
+    (("a", "b"), ("c",)). "NONE" or an empty value gives ().
+    """
+    if not text or text.strip() == "NONE":
+        return ()
+
+    options = []
+    for option in text.split("|"):
+        group = tuple(dict.fromkeys(part.strip() for part in option.split(",") if part.strip()))
+        if group:
+            options.append(group)
+    return tuple(options)
+
+
+def build_quest_index(quest_data_dict):
+    """Build the reverse prerequisite lists and level buckets for a catalog."""
+    unlocks = {}
+    level_buckets = {}
+    position = {}
+    requirements = {}
+    prerequisites = {}
+
+    for i, (qid, quest) in enumerate(quest_data_dict.items()):
+        position[qid] = i
+        level_buckets.setdefault(quest.get("required_level", 1), []).append(qid)
+
+        requirements[qid] = parse_prerequisites(quest.get("prerequisite", "NONE"))
+        prerequisites[qid] = tuple(dict.fromkeys(p for group in requirements[qid] for p in group))
+        for prereq in prerequisites[qid]:
+            unlocks.setdefault(prereq, []).append(qid)
+
+    # Catalog quests take the low bits in catalog order; IDs that are only
+    # named as prerequisites follow, so completing them still counts
+    bits = dict(position)
+    for prereq in unlocks:
+        bits.setdefault(prereq, len(bits))
+
+    analysis = _analyze_prerequisites(quest_data_dict, prerequisites, requirements, position)
+
+    # Changes whenever a quest or its rewards change, so saved totals can
+    # tell whether they were counted against this catalog
+    fingerprint = hashlib.blake2b(digest_size=8)
+    for qid, quest in quest_data_dict.items():
+        fingerprint.update(f"{qid}:{quest.get('reward_xp', 0)}:{quest.get('reward_gold', 0)}\n".encode())
+
+    # Stable sort, so quests on the same level stay in catalog order
+    by_level = sorted(quest_data_dict, key=lambda qid: quest_data_dict[qid].get("required_level", 1))
+
+    return {
+        "version": next(_index_versions),
+        "size": len(quest_data_dict),
+        "last": next(reversed(quest_data_dict), None),
+        "fingerprint": fingerprint.hexdigest(),
+        "unlocks": unlocks,
+        "requirements": requirements,
+        "prerequisites": prerequisites,
+        "bits": bits,
+        "masks": {},  # quest -> one bitmask per option, compiled on first check
+        "level_buckets": level_buckets,
+        "position": position,
+        "by_level": by_level,
+        "sorted_levels": [quest_data_dict[qid].get("required_level", 1) for qid in by_level],
+        "depth": analysis["depth"],
+        "earliest": analysis["earliest"],
+        "order": analysis["order"],
+        "route": analysis["route"],
+        "blocked": analysis["blocked"],
+        "cycles": analysis["cycles"],
+        "chains": {},
+    }
+
+
+def _analyze_prerequisites(quest_data_dict, edges, requirements, position):
+    """
+    One linear pass over the prerequisite graph using an iterative Tarjan
+    strongly-connected-components search, so deep chains cannot hit the
+    recursion limit. Tarjan finishes every quest's prerequisites before the
+    quest itself, which lets the same pass work out, prerequisites first:
+      depth     prerequisite steps before it (0 with no prerequisite)
+      earliest  lowest character level at which it can be unlocked
+      route     the prerequisite option with the fewest steps
+      order     a topological order of every quest that can be unlocked
+      blocked   quest -> ("missing", id) or ("cycle", cycle) for the rest
+      cycles    each cycle found, as a list of quest IDs
+    Edges are every quest named in any option, so a loop through an "or"
+    branch still counts as a cycle.
+    """
+    depth = {}
+    earliest = {}
+    route = {}
+    order = []
+    blocked = {}
+    cycles = []
+
+    number = {}  # visit order
+    low = {}
+    stack = []
+    on_stack = set()
+
+    for root in quest_data_dict:
+        if root in number:
+            continue
+
+        number[root] = low[root] = len(number)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges[root]))]
+
+        while work:
+            node, prereqs = work[-1]
+            for prereq in prereqs:
+                if prereq not in quest_data_dict:
+                    continue
+                if prereq not in number:
+                    number[prereq] = low[prereq] = len(number)
+                    stack.append(prereq)
+                    on_stack.add(prereq)
+                    work.append((prereq, iter(edges[prereq])))
+                    break
+                if prereq in on_stack:
+                    low[node] = min(low[node], number[prereq])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] != number[node]:
+                    continue
+
+                # node roots a component; everything above it on the stack is in it
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+
+                if len(component) > 1 or node in edges[node]:
+                    cycle = _cycle_path(position, edges, set(component))
+                    cycles.append(cycle)
+                    for member in component:
+                        blocked[member] = ("cycle", cycle)
+                    continue
+
+                _settle_quest(quest_data_dict, node, requirements[node], depth, earliest, route, blocked)
+                if node not in blocked:
+                    order.append(node)
+
+    return {"depth": depth, "earliest": earliest, "route": route, "order": order,
+            "blocked": blocked, "cycles": cycles}
+
+
+def _settle_quest(quest_data_dict, qid, options, depth, earliest, route, blocked):
+    # Every prerequisite is already settled (or blocked) when this runs. An
+    # option works if all its quests can be unlocked; the quest is blocked
+    # only when no option works.
+    required = quest_data_dict[qid].get("required_level", 1)
+    if not options:
+        depth[qid] = 0
+        earliest[qid] = required
+        route[qid] = ()
+        return
+
+    best = None
+    lowest = None
+    reason = None
+    for group in options:
+        steps = 0
+        level = required
+        for prereq in group:
+            if prereq not in quest_data_dict:
+                reason = reason or ("missing", prereq)
+                break
+            if prereq in blocked:
+                reason = reason or blocked[prereq]
+                break
+            steps = max(steps, depth[prereq] + 1)
+            level = max(level, earliest[prereq])
+        else:
+            if best is None or steps < best[0]:
+                best = (steps, group)
+            lowest = level if lowest is None else min(lowest, level)
+
+    if best is None:
+        blocked[qid] = reason
+        return
+
+    depth[qid], route[qid] = best
+    earliest[qid] = lowest
+
+
+def _cycle_path(position, edges, component):
+    # Follow prerequisites inside the component from its first quest in
+    # catalog order until one repeats; what lies between the repeats is a
+    # cycle. Only the component is looked at, so many cycles stay linear.
+    current = min(component, key=position.__getitem__)
+    path = []
+    seen = {}
+    while current not in seen:
+        seen[current] = len(path)
+        path.append(current)
+        current = next(p for p in edges[current] if p in component)
+    return path[seen[current]:]
+
+
+def _describe_cycle(cycle):
+    return "Quest prerequisites form a cycle: " + " -> ".join(cycle + cycle[:1])
+
+
+def _raise_if_blocked(index, quest_id):
+    reason = index["blocked"].get(quest_id)
+    if reason is None:
+        return
+    if reason[0] == "cycle":
+        raise CircularPrerequisiteError(_describe_cycle(reason[1]))
+    raise QuestNotFoundError("Prerequisite quest does not exist")
+
+
+def get_quest_index(quest_data_dict):
+    """
+    Return the index for a catalog, building it on first use. Indexes for
+    the last few catalogs are kept; one is rebuilt if its catalog changes
+    size or last quest, which catches quests added or removed. Call
+    invalidate_quest_index after editing a quest's fields in place.
+    """
+    key = id(quest_data_dict)
+    cached = _catalog_indexes.get(key)
+
+    if (cached is None or cached[0] is not quest_data_dict or cached[1]["size"] != len(quest_data_dict)
+            or cached[1]["last"] != next(reversed(quest_data_dict), None)):
+        cached = (quest_data_dict, build_quest_index(quest_data_dict))
+        _catalog_indexes[key] = cached
+        while len(_catalog_indexes) > MAX_CACHED_CATALOGS:
+            _catalog_indexes.popitem(last=False)
+
+    _catalog_indexes.move_to_end(key)
+    return cached[1]
+
+
+def invalidate_quest_index(quest_data_dict):
+    """Drop a catalog's index after editing its quests in place."""
+    _catalog_indexes.pop(id(quest_data_dict), None)
+
+
+def _index_holding(quest_data_dict, quest_id):
+    # The catalog's index, rebuilt if it was built before quest_id was added
+    index = get_quest_index(quest_data_dict)
+    if quest_id not in index["position"]:
+        invalidate_quest_index(quest_data_dict)
+        index = get_quest_index(quest_data_dict)
+    return index
+
+
+def _prerequisites_met(index, quest_id, completed_bits):
+    masks = index["masks"].get(quest_id)
+    if masks is None:
+        bits = index["bits"]
+        masks = []
+        for group in index["requirements"].get(quest_id, ()):
+            mask = 0
+            for prereq in group:
+                mask |= 1 << bits[prereq]
+            masks.append(mask)
+        masks = index["masks"][quest_id] = tuple(masks)
+
+    return not masks or any(completed_bits & mask == mask for mask in masks)
+
+
+def _completed_bits(index, quest_ids):
+    # Set the bits in a byte buffer and convert once, rather than growing
+    # a large integer one quest at a time
+    bits = index["bits"]
+    buffer = bytearray((len(bits) + 7) // 8)
+    for qid in quest_ids:
+        bit = bits.get(qid)
+        if bit is not None:
+            buffer[bit >> 3] |= 1 << (bit & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _build_frontier(character, quest_data_dict, index):
+    frontier = {
+        "index": index["version"],
+        "catalog": quest_data_dict,
+        "level": character["level"],
+        "completed": set(character["completed_quests"]),
+        "active": set(character["active_quests"]),
+        "available": set(),
+        "waiting": {},  # required level -> quests unlocked but above the character's level
+        "level_unlocks": set(),  # made available by a level-up, not yet reported
+    }
+    frontier["bits"] = _completed_bits(index, frontier["completed"])
+
+    # A full rebuild checks the options against the completed set; masks are
+    # only compiled for the quests later checked one at a time, so a huge
+    # catalog never holds a mask for every quest
+    completed = frontier["completed"]
+    for qid, quest in quest_data_dict.items():
+        if qid in completed or qid in frontier["active"]:
+            continue
+
+        options = index["requirements"].get(qid)
+        if options is None:
+            # A quest the index has never seen: the catalog's keys changed
+            # without changing its size or last quest, so start over
+            invalidate_quest_index(quest_data_dict)
+            return _build_frontier(character, quest_data_dict, get_quest_index(quest_data_dict))
+        if not options or any(all(p in completed for p in group) for group in options):
+            _place_quest(frontier, qid, quest)
+
+    _frontier_synced(frontier, character)
+    character["_quest_frontier"] = frontier
+    return frontier
+
+
+def _place_quest(frontier, qid, quest):
+    # An unlocked quest is either available now or waiting for a level
+    required = quest.get("required_level", 1)
+    if required <= frontier["level"]:
+        frontier["available"].add(qid)
+    else:
+        frontier["waiting"].setdefault(required, set()).add(qid)
+
+
+def _list_stamp(quest_list):
+    # OrderedQuestSet counts its changes. A plain list has no such count and
+    # its length misses same-length edits, so it never matches (None).
+    if isinstance(quest_list, OrderedQuestSet):
+        return quest_list.version
+    return None
+
+
+def _frontier_synced(frontier, character):
+    # Remember the lists we match so direct edits elsewhere can be detected
+    frontier["lists"] = (character["completed_quests"], character["active_quests"])
+    frontier["stamps"] = (_list_stamp(character["completed_quests"]), _list_stamp(character["active_quests"]))
+
+
+def _frontier_is_current(frontier, character):
+    completed, active = frontier["lists"]
+    return (completed is character["completed_quests"] and active is character["active_quests"]
+            and None not in frontier["stamps"]
+            and frontier["stamps"] == (_list_stamp(completed), _list_stamp(active)))
+
+
+def _quest_frontier(character, quest_data_dict, event_bus=None):
+    frontier = _current_frontier(character, quest_data_dict)
+    if frontier["level_unlocks"] and event_bus is not None:
+        _publish_level_unlocks(event_bus, character, _take_level_unlocks(frontier))
+    return frontier
+
+
+def _current_frontier(character, quest_data_dict):
+    index = get_quest_index(quest_data_dict)
+    frontier = character.get("_quest_frontier")
+
+    if (frontier is None or frontier["index"] != index["version"]
+            or not _frontier_is_current(frontier, character)
+            or character["level"] < frontier["level"]):
+        rebuilt = _build_frontier(character, quest_data_dict, index)
+        if frontier is not None and frontier["catalog"] is quest_data_dict:
+            _carry_level_unlocks(frontier, rebuilt)
+        return rebuilt
+
+    if character["level"] > frontier["level"]:
+        _frontier_level_up(frontier, character["level"])
+    return frontier
+
+
+def _frontier_level_up(frontier, level):
+    waiting = frontier["waiting"]
+    for required in [lvl for lvl in waiting if lvl <= level]:
+        quests = waiting.pop(required)
+        frontier["available"].update(quests)
+        frontier["level_unlocks"].update(quests)
+    frontier["level"] = level
+
+
+def _carry_level_unlocks(old, new):
+    # Keep unreported level unlocks across a rebuild, and count quests the
+    # old frontier's level held back that the new level makes available
+    catalog = new["catalog"]
+    for qid in new["available"]:
+        if qid in old["level_unlocks"] or catalog[qid].get("required_level", 1) > old["level"]:
+            new["level_unlocks"].add(qid)
+
+
+def _take_level_unlocks(frontier):
+    # Pending level unlocks still on offer, in catalog order; clears them
+    position = get_quest_index(frontier["catalog"])["position"]
+    unlocked = sorted(frontier["level_unlocks"] & frontier["available"], key=position.__getitem__)
+    frontier["level_unlocks"] = set()
+    return unlocked
+
+
+def _publish_level_unlocks(event_bus, character, unlocked):
+    for qid in unlocked:
+        event_bus.publish(QUEST_UNLOCKED, character=character.get("name"), quest_id=qid,
+                          available=True, unlocked_by=None)
+
+
+def _frontier_completed(frontier, character, quest_id):
+    frontier["active"].discard(quest_id)
+    frontier["completed"].add(quest_id)
+    _frontier_synced(frontier, character)
+
+    catalog = frontier["catalog"]
+    index = get_quest_index(catalog)
+    before = frontier["bits"]
+    bit = index["bits"].get(quest_id)
+    if bit is not None:
+        frontier["bits"] |= 1 << bit
+
+    # Only quests that name this one as a prerequisite can have become
+    # unlocked; the ones whose requirements were not met before are new
+    unlocked = []
+    for qid in index["unlocks"].get(quest_id, ()):
+        if (qid not in frontier["completed"] and qid not in frontier["active"]
+                and _prerequisites_met(index, qid, frontier["bits"])
+                and not _prerequisites_met(index, qid, before)):
+            _place_quest(frontier, qid, catalog[qid])
+            unlocked.append(qid)
+    return unlocked
+
+
+def _frontier_abandoned(frontier, character, quest_id):
+    # Called after the quest left the list, which is now one version newer
+    # than when the frontier last synced; plain lists are never trusted
+    completed, active = frontier["lists"]
+    if (completed is not character["completed_quests"] or active is not character["active_quests"]
+            or not isinstance(completed, OrderedQuestSet) or not isinstance(active, OrderedQuestSet)
+            or frontier["stamps"] != (completed.version, active.version - 1)):
+        character.pop("_quest_frontier", None)
+        return
+
+    frontier["active"].discard(quest_id)
+    _frontier_synced(frontier, character)
+
+    quest = frontier["catalog"].get(quest_id)
+    if quest is not None and _prerequisites_met(get_quest_index(frontier["catalog"]), quest_id, frontier["bits"]):
+        _place_quest(frontier, quest_id, quest)
 
 
 # ============================================================================
@@ -273,7 +983,13 @@ def validate_quest_prerequisites(quest_data_dict):
 # ============================================================================
 
 if __name__ == "__main__":
-    print("=== QUEST HANDLER TEST ===")
+    # python -m quest_handler analytics ... reports quest stats across all saves
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "analytics":
+        import quest_analytics
+        quest_analytics.main(sys.argv[2:])
+    else:
+        print("=== QUEST HANDLER TEST ===")
     
     # Test data
     # test_char = {
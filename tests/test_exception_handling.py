@@ -126,6 +126,20 @@ def test_quest_already_completed_exception():
     with pytest.raises(QuestAlreadyCompletedError):
         quest_handler.accept_quest(char, "done_quest", quests)
 
+def test_circular_prerequisite_exception():
+    """Test that prerequisite cycles are reported instead of looping forever"""
+    quests = {
+        'a': {'quest_id': 'a', 'prerequisite': 'c'},
+        'b': {'quest_id': 'b', 'prerequisite': 'a'},
+        'c': {'quest_id': 'c', 'prerequisite': 'b'},
+        'd': {'quest_id': 'd', 'prerequisite': 'b'},
+    }
+
+    with pytest.raises(CircularPrerequisiteError):
+        quest_handler.get_quest_prerequisite_chain('d', quests)
+    with pytest.raises(CircularPrerequisiteError, match="a -> c -> b -> a"):
+        quest_handler.validate_quest_prerequisites(quests)
+
 def test_quest_not_active_exception():
     """Test that QuestNotActiveError is raised when completing inactive quest"""
     char = {'level': 5, 'active_quests': [], 'completed_quests': []}
@@ -160,6 +174,53 @@ def test_invalid_data_format_exception():
     finally:
         os.remove("test_bad_data.txt")
 
+def test_invalid_item_effect_rejected():
+    """Test that malformed composite effects fail validation"""
+    bad_item = {
+        'item_id': 'bad',
+        'name': 'Bad',
+        'type': 'consumable',
+        'effect': 'health:20,strength',
+        'cost': 5,
+        'description': 'Broken'
+    }
+
+    with pytest.raises(InvalidDataFormatError):
+        game_data.validate_item_data(bad_item)
+
+def test_blank_quest_prerequisite_rejected():
+    """Test that prerequisite lists with an empty entry fail validation"""
+    quest = {'quest_id': 'q', 'title': 'Q', 'description': 'Q', 'reward_xp': 1,
+             'reward_gold': 1, 'required_level': 1, 'prerequisite': 'a,|b'}
+
+    with pytest.raises(InvalidDataFormatError):
+        game_data.validate_quest_data(quest)
+
+def test_quest_catalog_with_cycle_rejected_at_load():
+    """Test that load_quests rejects quests whose prerequisites loop"""
+    with open("test_cyclic_quests.txt", "w") as f:
+        for qid, prereq in [("a", "b"), ("b", "a")]:
+            f.write(f"QUEST_ID: {qid}\nTITLE: {qid}\nDESCRIPTION: loop\nREWARD_XP: 1\n"
+                    f"REWARD_GOLD: 1\nREQUIRED_LEVEL: 1\nPREREQUISITE: {prereq}\n\n")
+
+    try:
+        with pytest.raises(InvalidDataFormatError, match="cycle"):
+            game_data.load_quests("test_cyclic_quests.txt")
+    finally:
+        os.remove("test_cyclic_quests.txt")
+
+def test_invalid_enemy_data_rejected():
+    """Test that enemy files with bad stats are rejected"""
+    with open("test_bad_enemies.txt", "w") as f:
+        f.write("ENEMY_ID: ghost\nNAME: Ghost\nHEALTH: 0\nSTRENGTH: 5\nMAGIC: 5\n"
+                "XP_REWARD: 5\nGOLD_REWARD: 5\n")
+
+    try:
+        with pytest.raises(InvalidDataFormatError):
+            game_data.load_enemies("test_bad_enemies.txt")
+    finally:
+        os.remove("test_bad_enemies.txt")
+
 # ============================================================================
 # COMBAT EXCEPTION TESTS
 # ============================================================================
@@ -184,6 +245,17 @@ def test_combat_not_active_exception():
     with pytest.raises(CombatNotActiveError):
         battle.player_turn()
 
+def test_corrupted_replay_exception():
+    """Test that CorruptedDataError is raised for truncated replays"""
+    import combat_system
+    import battle_replay
+
+    char = character_manager.create_character("ReplayTest", "Warrior")
+    _, data = battle_replay.record_battle(char, combat_system.create_enemy("goblin"), seed=1)
+
+    with pytest.raises(CorruptedDataError):
+        battle_replay.decode_replay(data[:-2])
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
@@ -187,6 +187,451 @@ def test_quest_prerequisite_system():
     quest_handler.accept_quest(char, 'second_quest', quests)
     assert 'second_quest' in char['active_quests']
 
+def _scan_available_quests(char, quests):
+    # The original full scan, kept as the reference for the frontier
+    return [q for qid, q in quests.items()
+            if qid not in char['completed_quests'] and qid not in char['active_quests']
+            and char['level'] >= q.get('required_level', 1)
+            and (q.get('prerequisite', 'NONE') == 'NONE'
+                 or any(all(p in char['completed_quests'] for p in option.split(','))
+                        for option in q['prerequisite'].split('|')))]
+
+def test_available_quest_frontier_matches_full_scan():
+    """Test the incremental quest frontier against a full scan after every change"""
+    import random
+
+    rng = random.Random(41)
+    quests = {}
+    for i in range(60):
+        prereq = f"q{rng.randrange(i)}" if i and rng.random() < 0.7 else 'NONE'
+        quests[f"q{i}"] = {'quest_id': f"q{i}", 'required_level': rng.randint(1, 6),
+                           'prerequisite': prereq, 'reward_xp': 10, 'reward_gold': 5}
+
+    char = character_manager.create_character("FrontierTest", "Warrior")
+    for step in range(400):
+        available = quest_handler.get_available_quests(char, quests)
+        assert available == _scan_available_quests(char, quests)
+
+        roll = rng.random()
+        if roll < 0.4 and available:
+            quest_handler.accept_quest(char, rng.choice(available)['quest_id'], quests)
+        elif roll < 0.7 and char['active_quests']:
+            quest_handler.complete_quest(char, rng.choice(char['active_quests']), quests)
+        elif roll < 0.8 and char['active_quests']:
+            quest_handler.abandon_quest(char, rng.choice(char['active_quests']))
+        elif roll < 0.9:
+            char['level'] += 1
+        elif available:
+            # Direct list edits, as save loading and older code do
+            char['completed_quests'].append(rng.choice(available)['quest_id'])
+
+def test_frontier_follows_same_length_edits_of_plain_lists():
+    """Test that replacing an entry of a plain quest list in place refreshes the board and totals"""
+    quests = {
+        'a': {'quest_id': 'a', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 10, 'reward_gold': 1},
+        'b': {'quest_id': 'b', 'required_level': 1, 'prerequisite': 'a', 'reward_xp': 20, 'reward_gold': 2},
+        'x': {'quest_id': 'x', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 30, 'reward_gold': 3},
+    }
+    char = {'level': 1, 'completed_quests': ['x'], 'active_quests': [], 'experience': 0, 'gold': 0}
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)] == ['a']
+    assert quest_handler.get_total_quest_rewards_earned(char, quests)['total_xp'] == 30
+
+    char['completed_quests'][0] = 'a'
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)] == ['b', 'x']
+    assert not quest_handler.can_accept_quest(char, 'a', quests)
+    assert quest_handler.get_total_quest_rewards_earned(char, quests)['total_xp'] == 10
+
+def test_quest_depths_order_and_deep_chains():
+    """Test the depth index, topological order and chains thousands of quests deep"""
+    quests = {'side': {'prerequisite': 'NONE'}}
+    for i in range(5000):
+        quests[f"step{i}"] = {'prerequisite': f"step{i - 1}" if i else 'NONE'}
+    quests['branch'] = {'prerequisite': 'step2'}
+
+    chain = quest_handler.get_quest_prerequisite_chain('step4999', quests)
+    assert chain == [f"step{i}" for i in range(5000)]
+    assert quest_handler.get_quest_prerequisite_chain('branch', quests) == ['step0', 'step1', 'step2', 'branch']
+    assert quest_handler.get_quest_depth('branch', quests) == 3
+    assert quest_handler.get_quest_depth('side', quests) == 0
+
+    order = quest_handler.get_quest_topological_order(quests)
+    seen = set()
+    for qid in order:
+        prereq = quests[qid]['prerequisite']
+        assert prereq == 'NONE' or prereq in seen
+        seen.add(qid)
+    assert seen == set(quests)
+
+def test_multi_prerequisite_quests():
+    """Test "a,b" (both) and "a|b" (either) prerequisites, chains and the bitset frontier"""
+    import random
+    from custom_exceptions import QuestRequirementsNotMetError
+
+    quests = {
+        'a': {'quest_id': 'a', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 10, 'reward_gold': 5},
+        'b': {'quest_id': 'b', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 10, 'reward_gold': 5},
+        'c': {'quest_id': 'c', 'required_level': 1, 'prerequisite': 'a', 'reward_xp': 10, 'reward_gold': 5},
+        'both': {'quest_id': 'both', 'required_level': 1, 'prerequisite': 'a,b', 'reward_xp': 10, 'reward_gold': 5},
+        'either': {'quest_id': 'either', 'required_level': 1, 'prerequisite': 'c|b', 'reward_xp': 10, 'reward_gold': 5},
+    }
+    char = character_manager.create_character("MultiPrereqTest", "Rogue")
+
+    for qid in ['a', 'c']:
+        quest_handler.accept_quest(char, qid, quests)
+        quest_handler.complete_quest(char, qid, quests)
+    with pytest.raises(QuestRequirementsNotMetError):
+        quest_handler.accept_quest(char, 'both', quests)
+    assert quest_handler.accept_quest(char, 'either', quests)
+
+    quest_handler.accept_quest(char, 'b', quests)
+    quest_handler.complete_quest(char, 'b', quests)
+    assert quest_handler.accept_quest(char, 'both', quests)
+
+    # Chains and depths follow the shortest option
+    assert quest_handler.get_quest_prerequisite_chain('both', quests) == ['a', 'b', 'both']
+    assert quest_handler.get_quest_prerequisite_chain('either', quests) == ['b', 'either']
+    assert quest_handler.get_quest_depth('either', quests) == 1
+    assert quest_handler.parse_prerequisites("a, b|c") == (('a', 'b'), ('c',))
+
+    # Randomized catalog: the frontier must match a full scan throughout
+    rng = random.Random(47)
+    quests = {}
+    for i in range(80):
+        options = ['NONE']
+        if i and rng.random() < 0.8:
+            options = [','.join({f"q{rng.randrange(i)}" for _ in range(rng.randint(1, 3))})
+                       for _ in range(rng.randint(1, 2))]
+        quests[f"q{i}"] = {'quest_id': f"q{i}", 'required_level': rng.randint(1, 4),
+                           'prerequisite': '|'.join(options), 'reward_xp': 10, 'reward_gold': 5}
+
+    char = character_manager.create_character("MultiPrereqFrontier", "Mage")
+    for step in range(400):
+        available = quest_handler.get_available_quests(char, quests)
+        assert available == _scan_available_quests(char, quests)
+
+        roll = rng.random()
+        if roll < 0.45 and available:
+            quest_handler.accept_quest(char, rng.choice(available)['quest_id'], quests)
+        elif roll < 0.85 and char['active_quests']:
+            quest_handler.complete_quest(char, rng.choice(char['active_quests']), quests)
+        elif roll < 0.9 and char['active_quests']:
+            quest_handler.abandon_quest(char, rng.choice(char['active_quests']))
+        else:
+            char['level'] += 1
+
+def test_population_eligibility_matches_can_accept(monkeypatch):
+    """Test the numpy eligibility matrix and sparse results against can_accept_quest"""
+    pytest.importorskip("numpy")
+    import random
+    import quest_eligibility
+
+    rng = random.Random(48)
+    quests = {}
+    for i in range(90):  # more than 64 quests, so bitsets span several words
+        prereq = 'NONE'
+        if i and rng.random() < 0.8:
+            prereq = '|'.join(','.join({f"q{rng.randrange(i)}" for _ in range(rng.randint(1, 3))})
+                              for _ in range(rng.randint(1, 2)))
+        quests[f"q{i}"] = {'quest_id': f"q{i}", 'required_level': rng.randint(1, 5), 'prerequisite': prereq}
+    quests['retired_sequel'] = {'quest_id': 'retired_sequel', 'required_level': 1, 'prerequisite': 'retired'}
+
+    characters = []
+    for i in range(120):
+        done = rng.sample(list(quests), rng.randint(0, 60)) + ['retired'] * (i % 2)
+        active = [q for q in rng.sample(list(quests), 5) if q not in done]
+        characters.append({'level': rng.randint(1, 6), 'completed_quests': done, 'active_quests': active})
+
+    monkeypatch.setattr(quest_eligibility, "BLOCK_CELLS", 500)  # force several blocks
+    population = quest_eligibility.build_population(characters, quests)
+    matrix = quest_eligibility.eligibility_matrix(population)
+
+    expected = [[quest_handler.can_accept_quest(char, qid, quests) for qid in quests] for char in characters]
+    assert matrix.tolist() == expected
+    assert matrix.any() and not matrix.all()
+
+    rows, columns = quest_eligibility.eligible_pairs(population)
+    assert sorted(zip(rows.tolist(), columns.tolist())) == list(zip(*[a.tolist() for a in matrix.nonzero()]))
+    column = list(quests).index('retired_sequel')
+    assert quest_eligibility.eligible_characters(population, 'retired_sequel').tolist() == \
+        matrix[:, column].nonzero()[0].tolist()
+
+def test_quest_event_bus_reports_unlocks():
+    """Test typed quest events, unlocks from completions and level-ups, and batching"""
+    import quest_events
+
+    quests = {
+        'a': {'quest_id': 'a', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 10, 'reward_gold': 5},
+        'x': {'quest_id': 'x', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 10, 'reward_gold': 5},
+        'high': {'quest_id': 'high', 'required_level': 2, 'prerequisite': 'a', 'reward_xp': 10, 'reward_gold': 5},
+        'both': {'quest_id': 'both', 'required_level': 1, 'prerequisite': 'a,x', 'reward_xp': 10, 'reward_gold': 5},
+        'either': {'quest_id': 'either', 'required_level': 1, 'prerequisite': 'x|a', 'reward_xp': 10, 'reward_gold': 5},
+    }
+    char = character_manager.create_character("EventTest", "Warrior")
+    bus = quest_events.QuestEventBus()
+    dropped = bus.subscribe(lambda event: pytest.fail("unsubscribed handler called"))
+    bus.unsubscribe(dropped)
+    seen = []
+    bus.subscribe(seen.append)
+    unlocks = []
+    bus.subscribe(unlocks.append, quest_events.QUEST_UNLOCKED)
+
+    quest_handler.accept_quest(char, 'a', quests, event_bus=bus)
+    quest_handler.complete_quest(char, 'a', quests, event_bus=bus)
+    assert [(e['type'], e['quest_id']) for e in seen] == [
+        ('quest_accepted', 'a'), ('quest_completed', 'a'),
+        ('quest_unlocked', 'high'), ('quest_unlocked', 'either')]
+    assert [(e['quest_id'], e['available'], e['unlocked_by']) for e in unlocks] == [
+        ('high', False, 'a'), ('either', True, 'a')]
+
+    # 'either' was already unlocked by 'a', so only 'both' is new
+    quest_handler.accept_quest(char, 'x', quests, event_bus=bus)
+    quest_handler.complete_quest(char, 'x', quests, event_bus=bus)
+    assert [e['quest_id'] for e in unlocks[2:]] == ['both']
+
+    # gain_experience reports the level-up and the quests it makes available
+    character_manager.gain_experience(char, 250, event_bus=bus)
+    assert seen[-2] == {'type': 'level_up', 'character': 'EventTest', 'level': 2, 'previous_level': 1}
+    assert (unlocks[-1]['quest_id'], unlocks[-1]['available'], unlocks[-1]['unlocked_by']) == ('high', True, None)
+    assert quest_handler.check_level_unlocks(char, quests, event_bus=bus) == []
+
+    # Level unlocks survive board refreshes made without the bus, for
+    # set-backed and plain-list characters alike
+    for lists in (list, quest_handler.OrderedQuestSet):
+        raw = {'name': 'Raw', 'level': 1, 'active_quests': lists(), 'completed_quests': lists(['a'])}
+        quest_handler.get_available_quests(raw, quests)
+        raw['level'] = 3
+        assert quests['high'] in quest_handler.get_available_quests(raw, quests)
+        assert quest_handler.can_accept_quest(raw, 'high', quests)
+        count = len(unlocks)
+        assert [q['quest_id'] for q in quest_handler.check_level_unlocks(raw, quests, event_bus=bus)] == ['high']
+        assert [e['quest_id'] for e in unlocks[count:]] == ['high']
+
+    quest_handler.accept_quest(char, 'both', quests, event_bus=bus)
+    quest_handler.abandon_quest(char, 'both', event_bus=bus)
+    assert seen[-1]['type'] == 'quest_abandoned'
+
+    # Batched delivery: one list per subscriber per flush, flushed when full
+    batched = quest_events.QuestEventBus(batch=True, max_pending=5)
+    batches = []
+    batched.subscribe(batches.append, quest_events.QUEST_ACCEPTED, quest_events.QUEST_COMPLETED)
+    other = character_manager.create_character("BatchTest", "Mage")
+    quest_handler.accept_quest(other, 'a', quests, event_bus=batched)
+    quest_handler.complete_quest(other, 'a', quests, event_bus=batched)
+    assert batches == [] and len(batched.pending) == 4
+    assert batched.flush() == 4
+    assert [[e['type'] for e in batch] for batch in batches] == [['quest_accepted', 'quest_completed']]
+
+    quest_handler.accept_quest(other, 'x', quests, event_bus=batched)
+    quest_handler.complete_quest(other, 'x', quests, event_bus=batched)  # completed + unlocked 'both'
+    quest_handler.accept_quest(other, 'both', quests, event_bus=batched)
+    assert len(batches) == 1
+    quest_handler.abandon_quest(other, 'both', event_bus=batched)  # fifth event flushes on its own
+    assert batched.pending == []
+    assert [e['type'] for e in batches[1]] == ['quest_accepted', 'quest_completed', 'quest_accepted']
+
+    with pytest.raises(ValueError):
+        batched.subscribe(print, "quest_exploded")
+
+def test_quest_analytics_over_save_directory(tmp_path):
+    """Test streaming quest analytics across saves, serially and in a process pool"""
+    import quest_analytics
+
+    quests = {
+        'intro': {'quest_id': 'intro', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 10, 'reward_gold': 1},
+        'middle': {'quest_id': 'middle', 'required_level': 1, 'prerequisite': 'intro', 'reward_xp': 20, 'reward_gold': 2},
+        'finale': {'quest_id': 'finale', 'required_level': 1, 'prerequisite': 'middle', 'reward_xp': 30, 'reward_gold': 3},
+    }
+    progress = [(1, [], []), (2, ['middle'], ['intro']), (3, [], ['intro', 'middle']),
+                (5, [], ['intro', 'middle', 'finale', 'retired_quest'])]
+    for i, (level, active, completed) in enumerate(progress):
+        char = character_manager.create_character(f"Player{i}", "Warrior")
+        char['level'] = level
+        char['active_quests'].extend(active)
+        char['completed_quests'].extend(completed)
+        character_manager.save_character(char, str(tmp_path))
+    (tmp_path / "Broken_save.txt").write_text("NAME: Broken\nLEVEL: lots\n")
+    (tmp_path / "notes.txt").write_text("not a save")
+
+    report = quest_analytics.analyze_saves(str(tmp_path), quests, ['finale'], workers=1)
+    assert report['players'] == 4 and report['skipped'] == 1
+    rows = {row['quest_id']: row for row in report['quests']}
+    assert rows['intro']['completion_rate'] == 0.75
+    assert rows['intro']['median_level'] == 3
+    assert rows['middle']['active'] == 1 and rows['finale']['median_level'] == 5
+    assert [step['players'] for step in report['funnels']['finale']] == [3, 2, 1]
+    assert report['funnels']['finale'][0]['drop_off'] == 0.25
+    assert report['rewards']['xp'] == 10 * 3 + 20 * 2 + 30 and report['rewards']['gold'] == 3 + 4 + 3
+
+    pooled = quest_analytics.analyze_saves(str(tmp_path), quests, ['finale'], workers=2, chunk_size=1)
+    assert pooled == report
+
+def test_quest_analytics_funnel_counts_other_prerequisite_routes(tmp_path):
+    """Test that finishing a later funnel step by another route is not a drop-off"""
+    import quest_analytics
+
+    quests = {
+        'intro': {'quest_id': 'intro', 'required_level': 1, 'prerequisite': 'NONE', 'reward_xp': 0, 'reward_gold': 0},
+        'middle': {'quest_id': 'middle', 'required_level': 1, 'prerequisite': 'intro', 'reward_xp': 0, 'reward_gold': 0},
+        'detour': {'quest_id': 'detour', 'required_level': 1, 'prerequisite': 'intro', 'reward_xp': 0, 'reward_gold': 0},
+        'finale': {'quest_id': 'finale', 'required_level': 1, 'prerequisite': 'middle|detour', 'reward_xp': 0, 'reward_gold': 0},
+    }
+    chain = quest_handler.get_quest_prerequisite_chain('finale', quests)
+    other = 'detour' if 'middle' in chain else 'middle'
+    char = character_manager.create_character("Detour", "Warrior")
+    char['completed_quests'].extend(['intro', other, 'finale'])
+    character_manager.save_character(char, str(tmp_path))
+
+    report = quest_analytics.analyze_saves(str(tmp_path), quests, ['finale'], workers=1)
+    assert [step['players'] for step in report['funnels']['finale']] == [1, 1, 1]
+
+    with pytest.raises(SystemExit):
+        quest_analytics.main(["--saves", str(tmp_path), "--funnel", "no_such_quest"])
+
+def test_quest_lists_are_ordered_sets_that_save_and_load():
+    """Test the set-backed quest lists keep order, skip repeats and survive saving"""
+    import pickle
+
+    char = character_manager.create_character("QuestSetTest", "Mage")
+    completed = char['completed_quests']
+    for qid in ["c", "a", "b", "a"]:
+        completed.append(qid)
+
+    assert completed == ["c", "a", "b"]
+    assert "a" in completed and "z" not in completed
+    completed.remove("a")
+    assert "a" not in completed
+    completed[0:1] = ["b", "d"]  # slice edits keep the set in step and drop repeats
+    assert completed == ["b", "d"] and "c" not in completed
+
+    copy = pickle.loads(pickle.dumps(completed))
+    assert copy == ["b", "d"] and "d" in copy
+
+    character_manager.save_character(char)
+    try:
+        loaded = character_manager.load_character("QuestSetTest")
+    finally:
+        character_manager.delete_character("QuestSetTest")
+    assert loaded['completed_quests'] == ["b", "d"]
+    assert isinstance(loaded['completed_quests'], quest_handler.OrderedQuestSet)
+    assert quest_handler.is_quest_completed(loaded, "d")
+
+def test_quests_by_level_range_queries():
+    """Test level range queries against a plain filter"""
+    quests = {f"q{i}": {'quest_id': f"q{i}", 'required_level': (i * 7) % 12 + 1} for i in range(50)}
+
+    for low, high in [(1, 1), (3, 6), (0, 100), (13, 20), (6, 2)]:
+        expected = sorted((q for q in quests.values() if low <= q['required_level'] <= high),
+                          key=lambda q: q['required_level'])
+        assert quest_handler.get_quests_by_level(quests, low, high) == expected
+
+    near = quest_handler.get_quests_near_level(quests, 5, spread=1)
+    assert {q['required_level'] for q in near} == {4, 5, 6}
+
+    # A reloaded catalog is a new dict and gets its own index
+    quests = dict(quests, extra={'quest_id': 'extra', 'required_level': 5})
+    assert quest_handler.get_quests_near_level(quests, 5, spread=0)[-1]['quest_id'] == 'extra'
+
+def test_quest_index_follows_same_size_catalog_edits():
+    """Test that a catalog edited in place without changing size gives fresh answers"""
+    quest = lambda qid: {'quest_id': qid, 'required_level': 1, 'prerequisite': 'NONE'}
+    quests = {'a': quest('a'), 'b': quest('b')}
+    char = character_manager.create_character("CatalogEditTest", "Mage")
+    assert len(quest_handler.get_available_quests(char, quests)) == 2
+    assert len(quest_handler.get_quests_by_level(quests, 1, 1)) == 2
+
+    quests['b']['required_level'] = 5
+    assert [q['quest_id'] for q in quest_handler.get_quests_by_level(quests, 1, 1)] == ['a']
+
+    del quests['b']
+    quests['c'] = quest('c')
+    fresh = character_manager.create_character("CatalogEditFresh", "Mage")
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(fresh, quests)] == ['a', 'c']
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)] == ['a', 'c']
+
+    # Keys swapped while the last quest stays last
+    last = quests.pop('c')
+    del quests['a']
+    quests['d'] = quest('d')
+    quests['c'] = last
+    assert quest_handler.get_quest_depth('d', quests) == 0
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(fresh, quests)] == ['d', 'c']
+
+def test_running_quest_totals():
+    """Test quest totals kept by complete_quest, saved, and rebuilt for a new catalog"""
+    quests = {f"q{i}": {'quest_id': f"q{i}", 'required_level': 1, 'prerequisite': 'NONE',
+                        'reward_xp': 10 * i, 'reward_gold': i} for i in range(1, 5)}
+    char = character_manager.create_character("TotalsTest", "Rogue")
+    char['completed_quests'].append("retired_quest")  # no longer in the catalog
+
+    for qid in ["q1", "q3"]:
+        quest_handler.accept_quest(char, qid, quests)
+        quest_handler.complete_quest(char, qid, quests)
+        assert quest_handler.get_quest_completion_percentage(char, quests) == char['quest_totals']['completed'] * 25
+
+    assert quest_handler.get_total_quest_rewards_earned(char, quests) == {'total_xp': 40, 'total_gold': 4}
+    assert quest_handler.get_quest_completion_percentage(char, quests) == 50.0
+
+    character_manager.save_character(char)
+    try:
+        loaded = character_manager.load_character("TotalsTest")
+    finally:
+        character_manager.delete_character("TotalsTest")
+    assert loaded['quest_totals'] == char['quest_totals']
+
+    # A catalog with different rewards gets its totals recounted
+    richer = {qid: dict(q, reward_gold=100) for qid, q in quests.items()}
+    assert quest_handler.get_total_quest_rewards_earned(loaded, richer) == {'total_xp': 40, 'total_gold': 200}
+
+def test_quest_catalog_analysis():
+    """Test the whole-catalog report: missing quests, cycles, level cap and depth"""
+    quests = {
+        'start': {'required_level': 1, 'prerequisite': 'NONE'},
+        'middle': {'required_level': 4, 'prerequisite': 'start'},
+        'end': {'required_level': 2, 'prerequisite': 'middle'},  # still needs level 4
+        'orphan': {'required_level': 1, 'prerequisite': 'lost_quest'},
+        'after_orphan': {'required_level': 1, 'prerequisite': 'orphan'},
+        'loop_a': {'required_level': 1, 'prerequisite': 'loop_b'},
+        'loop_b': {'required_level': 1, 'prerequisite': 'loop_a'},
+        'into_loop': {'required_level': 1, 'prerequisite': 'loop_a'},
+    }
+
+    report = quest_handler.analyze_quest_catalog(quests, max_level=3)
+    assert report['missing'] == [('orphan', 'lost_quest')]
+    assert report['cycles'] == [['loop_a', 'loop_b']]
+    assert set(report['unreachable']) == {'middle', 'end', 'orphan', 'after_orphan',
+                                         'loop_a', 'loop_b', 'into_loop'}
+    assert "level 4" in report['unreachable']['end']
+    assert (report['max_depth'], report['deepest']) == (2, 'end')
+
+    # Depths agree with walking each chain by hand on random catalogs
+    import random
+    rng = random.Random(46)
+    for _ in range(20):
+        quests = {f"q{i}": {'prerequisite': f"q{rng.randrange(30)}" if rng.random() < 0.8 else 'NONE'}
+                  for i in range(30)}
+        report = quest_handler.analyze_quest_catalog(quests)
+        for qid in quests:
+            seen, current = [], qid
+            while current != 'NONE' and current not in seen:
+                seen.append(current)
+                current = quests[current]['prerequisite']
+            if current == 'NONE':
+                assert quest_handler.get_quest_depth(qid, quests) == len(seen) - 1
+            else:
+                assert qid in report['unreachable']
+
+def test_quest_catalog_analysis_with_many_cycles():
+    """Test that a catalog made of thousands of cycles is reported in one pass"""
+    quests = {}
+    for i in range(0, 20000, 2):
+        quests[f"q{i}"] = {'required_level': 1, 'prerequisite': f"q{i + 1}"}
+        quests[f"q{i + 1}"] = {'required_level': 1, 'prerequisite': f"q{i}"}
+
+    report = quest_handler.analyze_quest_catalog(quests)
+    assert len(report['cycles']) == 10000
+    assert sorted(report['cycles'])[:2] == [['q0', 'q1'], ['q10', 'q11']]
+    assert len(report['unreachable']) == len(quests)
+
 # ============================================================================
 # COMBAT INTEGRATION TESTS
 # ============================================================================
@@ -320,6 +765,542 @@ def test_complete_game_workflow():
     # Cleanup
     character_manager.delete_character("WorkflowTest")
 
+# ============================================================================
+# CONCURRENCY TESTS
+# ============================================================================
+
+def test_concurrent_purchases_keep_invariants():
+    """Stress purchases from many threads against a few shared characters"""
+    from concurrent.futures import ThreadPoolExecutor
+    from custom_exceptions import InsufficientResourcesError, InventoryFullError
+
+    chars = [character_manager.create_character(f"Buyer{i}", "Rogue") for i in range(4)]
+    for char in chars:
+        char['gold'] = 400
+    item_data = {'cost': 5, 'type': 'consumable'}
+
+    def buy(n):
+        char = chars[n % len(chars)]
+        try:
+            inventory_system.purchase_item(char, "health_potion", item_data)
+        except (InsufficientResourcesError, InventoryFullError):
+            pass
+        character_manager.add_gold(char, 1)
+        character_manager.add_gold(char, -1)
+
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    character_manager.enable_character_locking(stripes=2)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(buy, range(4000)))
+    finally:
+        character_manager.disable_character_locking()
+        sys.setswitchinterval(old_interval)
+
+    for char in chars:
+        # 80 potions affordable per character, stacked 10 to a slot
+        assert len(char['inventory']) == 80
+        assert char['gold'] == 0
+        assert inventory_system.get_inventory_slots_used(char) == 8
+
+# ============================================================================
+# ITEM EFFECT ENGINE TESTS
+# ============================================================================
+
+def test_composite_item_effects():
+    """Test that multi-stat effects compile once and apply every stat"""
+    char = character_manager.create_character("ElixirTest", "Warrior")
+    char['health'] = 100
+    original_strength = char['strength']
+
+    effects = inventory_system.compile_item_effect("health:50,strength:5")
+    assert effects is inventory_system.compile_item_effect("health:50,strength:5")
+
+    item_data = {'name': 'Elixir', 'type': 'consumable', 'effect': 'health:50,strength:5'}
+    inventory_system.add_item_to_inventory(char, "elixir")
+    message = inventory_system.use_item(char, "elixir", item_data)
+
+    assert char['health'] == char['max_health']  # Capped
+    assert char['strength'] == original_strength + 5
+    assert message == "Used Elixir and gained health +50, strength +5"
+
+def test_apply_effects_batch():
+    """Test applying one item to many characters at once"""
+    chars = [character_manager.create_character(f"Batch{i}", "Mage") for i in range(5)]
+    for char in chars:
+        char['health'] = 10
+
+    effects = inventory_system.compile_item_effect("health:20")
+    assert inventory_system.apply_effects_batch(chars, effects) == 5
+    assert all(char['health'] == 30 for char in chars)
+
+    effects = inventory_system.compile_item_effect("magic:1,strength:2")
+    inventory_system.apply_effects_batch(chars, effects)
+    assert all(char['magic'] == 21 and char['strength'] == 10 for char in chars)
+
+# ============================================================================
+# BENCHMARK SMOKE TEST
+# ============================================================================
+
+def test_inventory_benchmarks_smoke():
+    """Test that the benchmark suite runs and produces comparable JSON"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+    import inventory_benchmarks
+
+    report = inventory_benchmarks.run_benchmarks(sizes=[20, 50], repeat=1, number=3)
+
+    assert set(report['results']) == set(inventory_benchmarks.CASES)
+    assert report['results']['purchase']['50']['best_s'] > 0
+
+    rows = inventory_benchmarks.compare_results(report, report)
+    assert len(rows) == len(inventory_benchmarks.CASES) * 2
+
+# ============================================================================
+# INVENTORY CAPACITY TESTS
+# ============================================================================
+
+def test_consumables_stack_into_slots():
+    """Test per-character capacity and consumable stacking"""
+    char = character_manager.create_character("StackTest", "Rogue")
+    potion = {'type': 'consumable', 'cost': 1}
+    sword = {'type': 'weapon', 'cost': 1}
+
+    inventory_system.set_inventory_capacity(char, 2)
+    for _ in range(inventory_system.STACK_LIMITS['consumable']):
+        inventory_system.add_item_to_inventory(char, "health_potion", potion)
+    assert inventory_system.get_inventory_slots_used(char) == 1
+
+    inventory_system.add_item_to_inventory(char, "iron_sword", sword)
+    assert inventory_system.get_inventory_space_remaining(char) == 0
+
+    from custom_exceptions import InventoryFullError
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_item_to_inventory(char, "health_potion", potion)
+
+    # Freeing one potion makes room in its stack again
+    inventory_system.remove_item_from_inventory(char, "health_potion")
+    inventory_system.add_item_to_inventory(char, "health_potion", potion)
+    assert inventory_system.count_item(char, "health_potion") == 10
+
+    # Capacity survives a save and load
+    character_manager.save_character(char)
+    loaded = character_manager.load_character("StackTest")
+    assert inventory_system.get_inventory_capacity(loaded) == 2
+    character_manager.delete_character("StackTest")
+
+def test_stacked_inventory_keeps_its_slots_after_loading(tmp_path):
+    """Test that a saved stack still takes the same slots when loaded"""
+    char = character_manager.create_character("StackSave", "Rogue")
+    char['gold'] = 1000
+    potion = {'type': 'consumable', 'cost': 1}
+    for _ in range(60):
+        inventory_system.purchase_item(char, "health_potion", potion)
+    assert inventory_system.get_inventory_slots_used(char) == 6
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("StackSave", str(tmp_path))
+    assert inventory_system.get_inventory_slots_used(loaded) == 6
+    assert inventory_system.get_inventory_space_remaining(loaded) == 14
+
+    # A loaded character at a small capacity still has room for one more item
+    inventory_system.set_inventory_capacity(loaded, 7)
+    inventory_system.add_item_to_inventory(loaded, "rope")
+    assert inventory_system.get_inventory_space_remaining(loaded) == 0
+
+def test_slot_index_follows_direct_list_changes():
+    """Test that editing the inventory list directly keeps counts correct"""
+    char = character_manager.create_character("IndexTest", "Mage")
+    inventory_system.add_item_to_inventory(char, "iron_sword")
+
+    char['inventory'].append("iron_sword")
+    assert inventory_system.count_item(char, "iron_sword") == 2
+    assert inventory_system.get_inventory_space_remaining(char) == 18
+
+    char['inventory'] = []
+    assert not inventory_system.has_item(char, "iron_sword")
+    assert inventory_system.get_inventory_slots_used(char) == 0
+
+    # Same-length edits, on the game's list and on a plain list
+    for inventory in (character_manager.InventoryList(), []):
+        char['inventory'] = inventory
+        for _ in range(3):
+            inventory_system.add_item_to_inventory(char, "health_potion")
+        char['inventory'][0] = "iron_sword"
+        assert inventory_system.count_item(char, "health_potion") == 2
+        assert inventory_system.has_item(char, "iron_sword")
+
+    # A plain list is swapped for the game's list, keeping its items
+    char['inventory'] = ["rope", "rope"]
+    assert inventory_system.count_item(char, "rope") == 2
+    assert isinstance(char['inventory'], character_manager.InventoryList)
+    assert char['inventory'] == ["rope", "rope"]
+
+# ============================================================================
+# INVENTORY DISPLAY TESTS
+# ============================================================================
+
+def test_render_inventory_cache_and_pages():
+    """Test the buffered inventory view, its cache and pagination"""
+    char = character_manager.create_character("ViewTest", "Warrior")
+    items = {'health_potion': {'name': 'Health Potion', 'type': 'consumable'}}
+
+    assert inventory_system.render_inventory(char, items) == "\n--- Inventory ---\nEmpty\n"
+
+    inventory_system.add_item_to_inventory(char, "health_potion")
+    inventory_system.add_item_to_inventory(char, "health_potion")
+    first = inventory_system.render_inventory(char, items)
+    assert first == "\n--- Inventory ---\nHealth Potion (consumable) x2\n"
+    assert inventory_system.render_inventory(char, items) is first  # Cached
+
+    inventory_system.add_item_to_inventory(char, "mystery_box")
+    view = inventory_system.render_inventory(char, items, page=2, page_size=1)
+    assert view == "\n--- Inventory ---\nmystery_box (unknown) x1\nPage 2/2\n"
+
+    import io
+    out = io.StringIO()
+    inventory_system.display_inventory(char, items, stream=out)
+    assert out.getvalue() == "\n--- Inventory ---\nHealth Potion (consumable) x2\nmystery_box (unknown) x1\n"
+
+# ============================================================================
+# HEADLESS COMBAT TESTS
+# ============================================================================
+
+def test_headless_battle_with_policies():
+    """Test running battles without input() using policies and sinks"""
+    events = []
+    char = character_manager.create_character("HeadlessTest", "Warrior")
+    enemy = combat_system.create_enemy("goblin")
+
+    result = combat_system.run_headless_battle(char, enemy, sink=events.append)
+
+    assert result['winner'] == "player"
+    assert result['turns'] == 4  # 13 damage per hit against 50 HP
+    assert char['experience'] == enemy['xp_reward']
+    assert events[0]['type'] == "start"
+    assert any(e['type'] == "attack" and e['actor'] == "Goblin" for e in events)
+
+    # Plain functions work as policies too
+    char = character_manager.create_character("HeadlessTest", "Mage")
+    result = combat_system.run_headless_battle(
+        char, combat_system.create_enemy("goblin"), policy=lambda battle: combat_system.SPECIAL
+    )
+    assert result == {'winner': 'player', 'xp': 25, 'gold': 10, 'turns': 2}
+
+def test_interactive_policy_and_escape(monkeypatch, capsys):
+    """Test that the keyboard policy still drives battles and escapes end them"""
+    class LuckyRolls:
+        def random(self):
+            return 0.1
+
+    monkeypatch.setattr("builtins.input", lambda prompt="": "3")
+
+    char = character_manager.create_character("EscapeTest", "Rogue")
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("orc"), rng=LuckyRolls())
+    result = battle.start_battle()
+
+    assert result['winner'] == "escaped"
+    assert "You escaped successfully!" in capsys.readouterr().out
+
+def test_endless_battle_ends_in_draw():
+    """Test that max_turns stops battles nobody can win"""
+    char = character_manager.create_character("DrawTest", "Cleric")
+    enemy = combat_system.create_enemy("goblin")
+
+    result = combat_system.run_headless_battle(
+        char, enemy, policy=combat_system.ALWAYS_SPECIAL, max_turns=50
+    )
+    assert result['winner'] == "draw"
+
+def test_battle_sink_levels_and_buffering():
+    """Test verbosity levels and that buffered sinks write once per battle"""
+    import io
+
+    summary = combat_system.StructuredEventSink(level=combat_system.LOG_SUMMARY)
+    char = character_manager.create_character("SinkTest", "Mage")
+    combat_system.run_headless_battle(char, combat_system.create_enemy("goblin"),
+                                      policy=combat_system.ALWAYS_SPECIAL, sink=summary)
+    assert [e['type'] for e in summary.events] == ["start", "rewards", "end"]
+    assert summary.events[-1]['winner'] == "player"
+
+    actions = combat_system.StructuredEventSink(level=combat_system.LOG_ACTIONS)
+    char = character_manager.create_character("SinkTest", "Mage")
+    combat_system.run_headless_battle(char, combat_system.create_enemy("goblin"),
+                                      policy=combat_system.ALWAYS_SPECIAL, sink=actions)
+    assert not any(e['type'] == "stats" for e in actions.events)
+    special = next(e for e in actions.events if e['type'] == "special")
+    assert (special['ability'], special['amount']) == ("fireball", 40)
+
+    stream = io.StringIO()
+    buffered = combat_system.BufferedTextSink(stream=stream)
+    char = character_manager.create_character("SinkTest", "Mage")
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"),
+                                        policy=combat_system.ALWAYS_SPECIAL, sink=buffered)
+    battle.begin_battle()
+    battle.play_round()
+    assert stream.getvalue() == ""  # nothing written mid-battle
+
+    battle.play_round()
+    battle.finish_battle()
+    text = stream.getvalue()
+    assert ">>> Fireball! You scorched the enemy for 40 damage." in text
+    assert text.endswith(">>> You gained 25 XP and 10 gold!\n")
+    assert buffered.lines == []
+
+def test_battle_scheduler_runs_many_battles_concurrently():
+    """Test the asyncio scheduler: input coroutines, turn timeouts and the active cap"""
+    import asyncio
+    import battle_scheduler
+
+    async def slow_player(battle):
+        await asyncio.sleep(10)  # never answers in time
+        return combat_system.ESCAPE
+
+    async def scenario():
+        scheduler = battle_scheduler.BattleScheduler(max_active=5, turn_timeout=0.01)
+        sessions = []
+        for i in range(20):
+            source = slow_player if i == 0 else battle_scheduler.policy_input(combat_system.ALWAYS_ATTACK)
+            sessions.append((character_manager.create_character(f"Async{i}", "Warrior"),
+                             combat_system.create_enemy("goblin"), source))
+        results = await scheduler.run_all(sessions)
+        return scheduler, results
+
+    scheduler, results = asyncio.run(scenario())
+
+    # The timed-out player attacked automatically instead of escaping
+    assert all(r == {'winner': 'player', 'xp': 25, 'gold': 10, 'turns': 4} for r in results)
+    assert scheduler.peak_active == 5
+    assert scheduler.completed == 20 and scheduler.active == 0
+
+def test_battle_replay_round_trip():
+    """Test recording battles to bytes, replaying them and storing them in a file"""
+    import io
+    import battle_replay
+
+    stream = io.BytesIO()
+    results = []
+    for char_class in ["Warrior", "Mage", "Rogue", "Cleric"]:
+        for policy in [combat_system.ALWAYS_ATTACK, combat_system.ALWAYS_SPECIAL, lambda b: combat_system.ESCAPE]:
+            char = character_manager.create_character("ReplayTest", char_class)
+            result, data = battle_replay.record_battle(char, combat_system.create_enemy("orc"),
+                                                       policy=policy, seed=99, max_turns=40)
+            assert len(data) < 300  # 57-byte header, names, 5 bytes per turn
+            battle_replay.append_replay(stream, data)
+            results.append((result, char['health']))
+
+    stream.seek(0)
+    for data, (result, health) in zip(battle_replay.iter_replays(stream), results):
+        replayed, char, enemy = battle_replay.replay_battle(data)
+        assert replayed == result
+        assert char['health'] == health
+
+def test_battle_replay_detects_tampering():
+    """Test that a replay edited to claim different damage fails verification"""
+    import battle_replay
+    from custom_exceptions import ReplayMismatchError
+
+    char = character_manager.create_character("ReplayTest", "Warrior")
+    _, data = battle_replay.record_battle(char, combat_system.create_enemy("goblin"), seed=5)
+
+    tampered = bytearray(data)
+    tampered[-4] += 1  # last turn's player damage
+    with pytest.raises(ReplayMismatchError):
+        battle_replay.replay_battle(bytes(tampered))
+
+    # Without verification the actions alone are replayed
+    result, _, _ = battle_replay.replay_battle(bytes(tampered), verify=False)
+    assert result['winner'] == "player"
+
+# ============================================================================
+# COMBAT SIMULATION TESTS
+# ============================================================================
+
+def test_simulation_is_reproducible_across_workers():
+    """Test that seeded simulations give identical results for any worker count"""
+    import combat_simulation
+
+    settings = dict(battles=40, classes=["Rogue"], levels=[3], enemies=["orc"],
+                    policy="special", seed=7, chunk_size=10)
+    serial = combat_simulation.simulate(workers=1, **settings)
+    pooled = combat_simulation.simulate(workers=2, **settings)
+
+    assert serial == pooled
+    row = serial[0]
+    assert row['battles'] == 40
+    low, high = row['win_rate_ci']
+    assert 0.0 <= low <= row['win_rate'] <= high <= 1.0
+
+def test_simulation_levels_and_intervals():
+    """Test level ranges and the statistics helpers"""
+    import combat_simulation
+
+    assert combat_simulation.parse_levels(["1-3", "7"]) == [1, 2, 3, 7]
+    assert combat_simulation.build_character("Mage", 3)['level'] == 3
+
+    low, high = combat_simulation.wilson_interval(50, 100)
+    assert low < 0.5 < high
+    mean, low, high = combat_simulation.mean_interval(30, 90, 10)
+    assert mean == low == high == 3.0
+
+def test_vectorized_simulation_matches_scalar():
+    """Test that the numpy simulator agrees with the battle-by-battle engine"""
+    pytest.importorskip("numpy")
+    import combat_simulation
+
+    # Deterministic matchups must agree exactly
+    for cls in ["Warrior", "Mage", "Cleric"]:
+        scalar = combat_simulation.simulate(battles=20, classes=[cls], levels=[5], enemies=["dragon"],
+                                            policy="special", workers=1, max_turns=100)
+        vector = combat_simulation.simulate_vectorized(battles=20, classes=[cls], levels=[5],
+                                                       enemies=["dragon"], policy="special", max_turns=100)
+        assert scalar == vector
+
+    # The random Rogue crit must agree statistically
+    settings = dict(battles=2000, classes=["Rogue"], levels=[5], enemies=["dragon"], policy="special")
+    scalar = combat_simulation.simulate(workers=1, **settings)[0]
+    vector = combat_simulation.simulate_vectorized(**settings)[0]
+    assert abs(scalar['win_rate'] - vector['win_rate']) < 0.06
+    assert abs(scalar['mean_turns'] - vector['mean_turns']) < 0.3
+
+def test_seeded_battles_replay_exactly():
+    """Test that a battle's seed reproduces it event for event"""
+    def fight(seed):
+        events = []
+        char = character_manager.create_character("SeedTest", "Rogue")
+        policy = lambda battle: combat_system.SPECIAL if battle.turn % 2 else combat_system.ESCAPE
+        battle = combat_system.SimpleBattle(char, combat_system.create_enemy("orc"),
+                                            policy=policy, sink=events.append, seed=seed)
+        battle.start_battle()
+        return battle, events
+
+    first, first_events = fight(None)
+    assert first.seed is not None  # A seed is picked and kept
+
+    second, second_events = fight(first.seed)
+    assert second_events == first_events
+
+    seeds = combat_system.spawn_seeds(42, 4)
+    assert len(set(seeds)) == 4
+    assert seeds == combat_system.spawn_seeds(42, 4)
+    assert combat_system.derive_seed(42, 0) == seeds[0]
+
+def test_balance_tuning_ranks_candidates_and_caches_cells(tmp_path):
+    """Test the enemy stat grid search and its on-disk cell cache"""
+    import balance_tuning
+
+    base = combat_system.create_enemy("orc")
+    settings = dict(classes=["Warrior", "Rogue"], levels=[1, 2], policy="special",
+                    battles=40, seed=3)
+    cache_path = str(tmp_path / "cache.json")
+
+    ranked = balance_tuning.tune(base, {"health": [40, 200], "strength": [8]}, target_win_rate=1.0,
+                                 cache=balance_tuning.TuningCache(cache_path), workers=2, **settings)
+    assert ranked[0]['enemy']['health'] == 40  # the weak orc is always beaten
+    assert ranked[0]['score'] == 0.0
+    assert len(ranked[0]['cells']) == 4
+
+    # Widening the grid only computes the new cells; rewards share cells
+    cache = balance_tuning.TuningCache(cache_path)
+    assert len(cache.cells) == 8
+    again = balance_tuning.tune(base, {"health": [40, 200, 120], "strength": [8], "xp_reward": [50, 60]},
+                                target_win_rate=1.0, cache=cache, workers=1, **settings)
+    assert len(cache.cells) == 12
+    assert [c['cells'] for c in again if c['enemy']['health'] == 200][0] == ranked[1]['cells']
+
+    # A cell served from the cache equals a fresh run of a reward-only variant
+    import combat_simulation
+    enemy = dict(base, health=80, max_health=80, strength=12)
+    richer = dict(enemy, xp_reward=enemy['xp_reward'] + 100, name="Rich Orc")
+    assert balance_tuning.cell_key("Rogue", 1, enemy, "special", 400, 0, 1000) == \
+        balance_tuning.cell_key("Rogue", 1, richer, "special", 400, 0, 1000)
+    assert combat_simulation.evaluate_matchup("Rogue", 1, enemy, "special", 400) == \
+        combat_simulation.evaluate_matchup("Rogue", 1, richer, "special", 400)
+
+    fresh = balance_tuning.tune(base, {"health": [120], "strength": [8], "xp_reward": [60]},
+                                target_win_rate=1.0, workers=1, **settings)
+    assert fresh[0]['cells'] == [c['cells'] for c in again
+                                 if c['enemy']['health'] == 120 and c['enemy']['xp_reward'] == 60][0]
+
+# ============================================================================
+# ENEMY REGISTRY TESTS
+# ============================================================================
+
+def test_enemy_registry_from_data_file(tmp_path):
+    """Test that enemies come from the catalog and can be reloaded"""
+    enemies = game_data.load_enemies("data/enemies.txt")
+    assert set(enemies) >= {"goblin", "orc", "dragon"}
+
+    goblin = combat_system.create_enemy("goblin")
+    assert goblin['max_health'] == enemies['goblin']['health']
+    assert goblin is not combat_system.create_enemy("goblin")
+
+    custom = tmp_path / "enemies.txt"
+    custom.write_text(
+        "ENEMY_ID: slime\nNAME: Slime\nHEALTH: 5\nSTRENGTH: 1\nMAGIC: 0\n"
+        "XP_REWARD: 1\nGOLD_REWARD: 1\n"
+    )
+    try:
+        combat_system.load_enemy_templates(str(custom))
+        assert combat_system.create_enemy("slime")['name'] == "Slime"
+    finally:
+        combat_system.load_enemy_templates()
+
+def test_enemy_pool_recycles_dicts():
+    """Test that released enemies come back fully reset"""
+    pool = combat_system.EnemyPool()
+    orc = pool.acquire("orc")
+    orc['health'] = 0
+    pool.release(orc)
+
+    again = pool.acquire("orc")
+    assert again is orc
+    assert again['health'] == again['max_health'] == 80
+
+def test_analytic_resolution_matches_simulation():
+    """Test that the O(1) battle shortcut agrees with playing the battle out"""
+    import combat_simulation
+
+    for cls in ["Warrior", "Mage", "Cleric"]:
+        for level in [1, 4, 8]:
+            for enemy_type in ["goblin", "orc", "dragon"]:
+                for policy in [combat_system.ALWAYS_ATTACK, combat_system.ALWAYS_SPECIAL]:
+                    char = combat_simulation.build_character(cls, level)
+                    enemy = combat_system.create_enemy(enemy_type)
+
+                    quick = combat_system.resolve_battle_analytically(char, enemy, policy, max_turns=50)
+                    assert quick['analytic']
+                    assert char['health'] == char['max_health']  # Nothing changed
+
+                    played = combat_system.run_headless_battle(char, enemy, policy, max_turns=50)
+                    assert (quick['winner'], quick['turns']) == (played['winner'], played['turns'])
+                    assert quick['player_health'] == char['health']
+                    assert quick['enemy_health'] == enemy['health']
+
+def test_analytic_resolution_falls_back_for_random_policies():
+    """Test that random matchups are simulated instead"""
+    char = character_manager.create_character("FallbackTest", "Rogue")
+    enemy = combat_system.create_enemy("orc")
+
+    result = combat_system.resolve_battle_analytically(char, enemy, combat_system.ALWAYS_SPECIAL, seed=1)
+    assert not result['analytic']
+    assert result == combat_system.resolve_battle_analytically(char, enemy, combat_system.ALWAYS_SPECIAL, seed=1)
+    assert enemy['health'] == enemy['max_health']
+
+def test_simulation_rejects_endless_analytic_matchups():
+    """Test that a fight that never ends needs max_turns, and skips wasted battles"""
+    import combat_simulation
+
+    enemy = {'name': 'Wall', 'health': 500, 'max_health': 500, 'strength': 3, 'magic': 0,
+             'xp_reward': 0, 'gold_reward': 0}
+    with pytest.raises(ValueError):
+        combat_simulation.evaluate_matchup('Cleric', 1, enemy, policy='special', battles=5, max_turns=None)
+    assert combat_simulation.evaluate_matchup('Cleric', 1, enemy, policy='special', battles=5,
+                                              max_turns=50)['draws'] == 5
+
+    char = character_manager.create_character("SkipTest", "Rogue")
+    assert not combat_system.can_resolve_analytically(char, enemy, combat_system.ALWAYS_SPECIAL)
+    assert combat_system.can_resolve_analytically(char, enemy, combat_system.ALWAYS_ATTACK)
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
-